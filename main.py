@@ -1,6 +1,3 @@
-import speech_recognition as sr
-import pyttsx3
-from google import genai
 import os
 import sys
 import time
@@ -8,11 +5,24 @@ import re
 import logging
 import subprocess
 import webbrowser
-from typing import Optional
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
 import string
 import random
-import time
-import pyfiglet
+import queue
+import threading
+import itertools
+import json
+import importlib
+from functools import lru_cache
+from types import SimpleNamespace
+from contextlib import contextmanager
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+import sqlite3
+from array import array
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait as wait_for_futures
+from collections import OrderedDict, deque
 from colorama import init, Fore, Style
 
 # Initialize colorama
@@ -33,94 +43,1360 @@ GOODBYES = [
     "Logging off. Take care Sir!"
 ]
 
-# Optional runtime deps; degrade gracefully if unavailable
-try:
-    import requests  # type: ignore
-except Exception:  # pragma: no cover - optional at runtime
-    requests = None  # type: ignore
-try:
-    from pytube import YouTube  # type: ignore
-except Exception:  # pragma: no cover
-    YouTube = None # type: ignore
-try:
-    from selenium import webdriver  # type: ignore
-    from selenium.webdriver.common.by import By  # type: ignore
-    from selenium.webdriver.common.keys import Keys  # type: ignore
-except Exception:  # pragma: no cover
-    webdriver = None # type: ignore
-
-
-# Configure the Gemini client
-api_key = "Enter the API Key Here"
-if not api_key:
-    raise ValueError("API key not found. Please set the GEMINI_API_KEY environment variable.")
-client = genai.Client(api_key="Enter the API KEY HERE")
-
-# Initialize the recognizer
-r = sr.Recognizer()
+# Configure the Gemini client (created on first use, see get_genai_client)
+api_key = os.getenv("GEMINI_API_KEY")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+
+# Speak Gemini answers sentence-by-sentence while the rest is still streaming
+STREAM_RESPONSES = os.getenv("FRIDAY_STREAM_RESPONSES", "1") != "0"
+# Speak the first piece early once this many characters arrive, even mid-sentence
+FIRST_CHUNK_CHARS = int(os.getenv("FRIDAY_FIRST_CHUNK_CHARS", "80"))
+
+# Cache Gemini answers on disk; set FRIDAY_CACHE_PATH to an empty string for memory only
+RESPONSE_CACHE_ENABLED = os.getenv("FRIDAY_CACHE", "1") != "0"
+RESPONSE_CACHE_PATH = os.getenv(
+    "FRIDAY_CACHE_PATH", os.path.join(os.path.expanduser("~"), ".friday", "responses.sqlite3")
+)
+RESPONSE_CACHE_TTL = float(os.getenv("FRIDAY_CACHE_TTL", str(7 * 24 * 3600)))
+
+# Capture speech continuously in the background instead of opening the mic per turn
+CONTINUOUS_LISTENING = os.getenv("FRIDAY_CONTINUOUS_LISTENING", "1") != "0"
+# Stop talking as soon as a new phrase is recognized
+BARGE_IN = os.getenv("FRIDAY_BARGE_IN", "0") == "1"
+# Discard audio captured while Friday is speaking so its own voice is not taken as a command.
+# Set to 0 with headphones; barge-in only works when this is off.
+IGNORE_WHILE_SPEAKING = os.getenv("FRIDAY_IGNORE_WHILE_SPEAKING", "1") != "0"
+
+# Comma-separated engines raced for every phrase; the first confident result wins
+STT_ENGINES = [name.strip() for name in os.getenv("FRIDAY_STT_ENGINES", "google").split(",") if name.strip()]
+# Offline engine run before the cloud ("sphinx"), or empty to skip local decoding
+LOCAL_STT_ENGINE = os.getenv("FRIDAY_LOCAL_STT", "").strip()
+# Only phrases containing this word are acted on, e.g. "friday"
+WAKE_WORD = os.getenv("FRIDAY_WAKE_WORD", "").strip().lower()
+# Drop audio without enough speech energy before any recognizer sees it
+VAD_ENABLED = os.getenv("FRIDAY_VAD", "1") != "0"
+STT_TIMEOUT = float(os.getenv("FRIDAY_STT_TIMEOUT", "6"))
+
+# Append every traced turn to this JSONL file, e.g. "traces.jsonl"
+TRACE_PATH = os.getenv("FRIDAY_TRACE_PATH", "")
+
+# Pre-rendered logos are kept here so startup does not need pyfiglet
+LOGO_CACHE_DIR = os.getenv("FRIDAY_LOGO_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".friday"))
+
+# ------------------------------
+# Lazy Dependencies
+# ------------------------------
+# Heavy libraries and clients are created on first use, so startup and
+# `import main` only pay for the subsystems a session actually touches.
+# Modules are imported before taking an accessor's lock, so a slow import
+# in one subsystem never blocks another that is already loaded.
+
+_genai_client = None
+_genai_client_lock = threading.Lock()
+_recognizer = None
+_recognizer_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _import(name: str):
+    return importlib.import_module(name)
+
+
+def _import_optional(name: str):
+    """Imports an optional runtime dependency, returning None if it is unavailable."""
+    try:
+        return _import(name)
+    except Exception:  # pragma: no cover - optional at runtime
+        return None
+
+
+def get_sr():
+    """Returns the speech_recognition module."""
+    return _import("speech_recognition")
+
+
+def get_pyttsx3():
+    return _import("pyttsx3")
+
+
+def get_requests():
+    """Returns the requests module, or None if it is not installed."""
+    return _import_optional("requests")
+
+
+def get_youtube_class():
+    """Returns pytube's YouTube class, or None if pytube is not installed."""
+    pytube = _import_optional("pytube")
+    return pytube.YouTube if pytube is not None else None
+
+
+@lru_cache(maxsize=None)
+def get_selenium() -> Optional[SimpleNamespace]:
+    """Returns the Selenium pieces the login flow uses, or None if Selenium is not installed."""
+    try:
+        return SimpleNamespace(
+            webdriver=_import("selenium.webdriver"),
+            By=_import("selenium.webdriver.common.by").By,
+            Keys=_import("selenium.webdriver.common.keys").Keys,
+            EC=_import("selenium.webdriver.support.expected_conditions"),
+            WebDriverWait=_import("selenium.webdriver.support.ui").WebDriverWait,
+        )
+    except Exception:  # pragma: no cover - optional at runtime
+        return None
+
+
+def get_genai_client():
+    """Returns the shared Gemini client, creating it on first use."""
+    global _genai_client
+    if _genai_client is None:
+        if not api_key:
+            raise ValueError("API key not found. Please set the GEMINI_API_KEY environment variable.")
+        genai = _import("google.genai")
+        with _genai_client_lock:
+            if _genai_client is None:
+                _genai_client = genai.Client(api_key=api_key)
+    return _genai_client
+
+
+def get_recognizer():
+    """Returns the shared speech recognizer, creating it on first use."""
+    global _recognizer
+    if _recognizer is None:
+        sr = get_sr()
+        with _recognizer_lock:
+            if _recognizer is None:
+                _recognizer = sr.Recognizer()
+    return _recognizer
+
+
+# ------------------------------
+# Tracing
+# ------------------------------
+
+class TurnTracer:
+    """Times each pipeline stage of a turn and keeps latency samples per stage.
+
+    Capture and recognition are timed per phrase with timed() and travel
+    with the phrase until adopt() hands them to the turn that handles it, so
+    a phrase recognized while another turn is still running is not charged
+    to that turn. Spans recorded outside a turn only feed the histograms.
+    Finished turns are appended to path as JSON lines when a path is set.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_samples: int = 1000):
+        self.path = path
+        self.turns: deque = deque(maxlen=max_samples)
+        self._max_samples = max_samples
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._current: Optional[dict] = None
+        self._turn_started = 0.0
+        self._before_turn_ms = 0.0
+        self._phrase_spans: Dict[str, float] = {}
+
+    @contextmanager
+    def span(self, stage: str, per_turn: bool = True):
+        """Times the enclosed block as stage. Spans with per_turn=False only feed the histograms."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, (time.perf_counter() - start) * 1000, per_turn)
+
+    def record(self, stage: str, ms: float, per_turn: bool = True) -> None:
+        with self._lock:
+            if not per_turn or self._current is None:
+                self._sample(stage, ms)
+                return
+            spans = self._current["spans"]
+            spans[stage] = spans.get(stage, 0.0) + ms
+
+    @staticmethod
+    @contextmanager
+    def timed(spans: Dict[str, float], stage: str):
+        """Times the enclosed block into a phrase's own spans, to be passed to adopt() later."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            spans[stage] = spans.get(stage, 0.0) + (time.perf_counter() - start) * 1000
+
+    def adopt(self, spans: Dict[str, float]) -> None:
+        """Charges a phrase's spans to the turn that consumes it.
+
+        That is the open turn for a follow-up answer, otherwise the next
+        begin_turn().
+        """
+        with self._lock:
+            target = self._current["spans"] if self._current is not None else self._phrase_spans
+            for stage, ms in spans.items():
+                target[stage] = target.get(stage, 0.0) + ms
+
+    def mark(self, name: str) -> None:
+        """Records the time since the turn started under name, once per turn."""
+        with self._lock:
+            if self._current is not None and name not in self._current["marks"]:
+                self._current["marks"][name] = (time.perf_counter() - self._turn_started) * 1000
+
+    def begin_turn(self, text: str) -> None:
+        with self._lock:
+            self._current = {
+                "turn": next(self._ids),
+                "time": time.time(),
+                "text": text,
+                "spans": dict(self._phrase_spans),
+                "marks": {},
+            }
+            self._before_turn_ms = sum(self._phrase_spans.values())
+            self._phrase_spans.clear()
+            self._turn_started = time.perf_counter()
+
+    def end_turn(self) -> Optional[dict]:
+        """Closes the current turn, updates the histograms and exports it."""
+        with self._lock:
+            turn, self._current = self._current, None
+            if turn is None:
+                return None
+            turn["total_ms"] = self._before_turn_ms + (time.perf_counter() - self._turn_started) * 1000
+            for stage, ms in list(turn["spans"].items()) + list(turn["marks"].items()):
+                self._sample(stage, ms)
+            self._sample("turn", turn["total_ms"])
+            self.turns.append(turn)
+        if self.path:
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(turn) + "\n")
+            except OSError as e:
+                print(f"Could not write trace: {e}")
+        return turn
+
+    def _sample(self, stage: str, ms: float) -> None:
+        self._samples.setdefault(stage, deque(maxlen=self._max_samples)).append(ms)
+
+    def percentiles(self, stage: str, points: Tuple[int, ...] = (50, 90, 99)) -> Dict[str, float]:
+        with self._lock:
+            samples = sorted(self._samples.get(stage, ()))
+        if not samples:
+            return {}
+        result = {"count": len(samples), "max": samples[-1]}
+        for point in points:
+            result[f"p{point}"] = samples[min(len(samples) - 1, int(len(samples) * point / 100))]
+        return result
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            stages = list(self._samples)
+        return {stage: self.percentiles(stage) for stage in stages}
+
+    def report(self) -> None:
+        """Prints per-stage latency percentiles in milliseconds."""
+        print(f"{'stage':>12} {'count':>6} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}")
+        for stage, stats in self.summary().items():
+            print(f"{stage:>12} {stats['count']:>6} {stats['p50']:>9.1f} {stats['p90']:>9.1f} "
+                  f"{stats['p99']:>9.1f} {stats['max']:>9.1f}")
+
+    def export_jsonl(self, path: str) -> None:
+        """Writes every recorded turn to path, one JSON object per line."""
+        with self._lock:
+            turns = list(self.turns)
+        with open(path, "w", encoding="utf-8") as f:
+            for turn in turns:
+                f.write(json.dumps(turn) + "\n")
+
+
+_tracer: Optional[TurnTracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> TurnTracer:
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = TurnTracer(TRACE_PATH or None)
+    return _tracer
+
 
 # ------------------------------
 # UI Functions
 # ------------------------------
 
+@lru_cache(maxsize=None)
+def render_logo(text: str = "Jarvis", font: str = "doom") -> str:
+    """Returns the figlet logo, rendering it only once and caching it on disk."""
+    path = os.path.join(LOGO_CACHE_DIR, f"logo-{font}-{text}.txt")
+    try:
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        pass
+    logo = _import("pyfiglet").figlet_format(text, font=font)
+    try:
+        os.makedirs(LOGO_CACHE_DIR, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(logo)
+    except OSError as e:
+        print(f"Could not cache the logo: {e}")
+    return logo
+
+
 def display_logo():
     """Displays the Jarvis logo."""
-    font = "doom"
-    logo = pyfiglet.figlet_format("Jarvis", font=font)
-    print(Fore.CYAN + logo + Style.RESET_ALL)
+    print(Fore.CYAN + render_logo() + Style.RESET_ALL)
 
 # ------------------------------
 # Core Assistant Functions
 # ------------------------------
 
-def speak(text: str):
-    """Converts text to speech with pauses between sentences."""
+_SENTENCE_END = re.compile(r'[.!?](?=\s)')
+# A period after these does not end the sentence ("Dr. Smith", "e.g. this")
+_ABBREVIATIONS = frozenset({"mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "mt", "vs", "approx"})
+_LAST_WORD = re.compile(r'(\w+)$')
+
+
+def _sentence_end(text: str) -> int:
+    """Returns the index just past the first sentence end in text, or -1 if there is none yet."""
+    for match in _SENTENCE_END.finditer(text):
+        if match.group() == ".":
+            word = _LAST_WORD.search(text, 0, match.start())
+            word = word.group(1) if word else ""
+            if word.lower() in _ABBREVIATIONS or (len(word) == 1 and word.islower()):
+                continue
+        return match.end()
+    return -1
+
+
+def _split_sentences(text: str) -> list:
+    sentences = []
+    cut = _sentence_end(text)
+    while cut >= 0:
+        sentences.append(text[:cut])
+        text = text[cut:]
+        cut = _sentence_end(text)
+    sentences.append(text)
+    return sentences
+
+
+def _split_for_speech(text: str) -> list:
+    """Splits text into sentences and strips the punctuation pyttsx3 would read aloud."""
+    segments = []
+    for sentence in _split_sentences(text):
+        segment = sentence.translate(str.maketrans('', '', string.punctuation)).strip()
+        if segment: # Only speak if there's content
+            segments.append(segment)
+    return segments
+
+
+class SpeechWorker:
+    """Owns one long-lived pyttsx3 engine on a background thread and speaks queued text."""
+
+    def __init__(self, rate: int = 150, engine_factory=None):
+        self.rate = rate
+        self._engine_factory = engine_factory or (lambda: get_pyttsx3().init())
+        self._engine = None
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._idle = threading.Event()
+        self._idle.set()
+        self._generation = 0
+        self._stop_requested = threading.Event()
+        self._last_spoken = 0.0
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="speech-worker", daemon=True)
+            self._thread.start()
+
+    def say(self, text: str, filler: bool = False) -> None:
+        """Queues text for speaking and returns immediately.
+
+        Filler such as "Thinking..." is spoken as usual but does not count as
+        the turn's first audio.
+        """
+        self.start()
+        segments = _split_for_speech(text)
+        with self._lock:
+            generation = self._generation
+            self._pending += len(segments)
+            if segments:
+                self._idle.clear()
+        for segment in segments:
+            self._queue.put((generation, segment, filler))
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until everything queued so far has been spoken. Returns False on timeout."""
+        return self._idle.wait(timeout)
+
+    def is_speaking(self) -> bool:
+        return not self._idle.is_set()
+
+    def spoke_since(self, since: float) -> bool:
+        """Returns True if speech was playing at any point after the time.monotonic() value since."""
+        return self.is_speaking() or self._last_spoken >= since
+
+    def cancel(self) -> None:
+        """Drops all queued text and interrupts the current utterance (barge-in).
+
+        pyttsx3 engines are not thread-safe, so the current utterance is only
+        flagged here; the worker stops it from its own thread at the next word.
+        """
+        with self._lock:
+            self._generation += 1
+            self._stop_requested.set()
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                self._done()
+
+    def shutdown(self, timeout: Optional[float] = 2.0) -> None:
+        self.cancel()
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def _done(self) -> None:
+        with self._lock:
+            self._pending -= 1
+            if self._pending <= 0:
+                self._pending = 0
+                self._idle.set()
+
+    def _on_word(self, name=None, location=None, length=None) -> None:
+        # Runs on the worker thread inside runAndWait(), where stopping is safe
+        if self._stop_requested.is_set():
+            self._engine.stop()
+
+    def _run(self) -> None:
+        try:
+            self._engine = self._engine_factory()
+            self._engine.setProperty('rate', self.rate) # Set speech rate to a slower value
+            if hasattr(self._engine, "connect"):
+                self._engine.connect('started-word', self._on_word)
+        except Exception as e:
+            print(f"Error in speak function: {e}")
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            generation, segment, filler = item
+            with self._lock:
+                current = generation == self._generation
+                if current:
+                    self._stop_requested.clear()
+            try:
+                if self._engine is not None and current:
+                    tracer = get_tracer()
+                    if not filler:
+                        tracer.mark("first_audio")
+                    # Greetings and job announcements outside a turn only feed the histogram
+                    with tracer.span("speak"):
+                        self._engine.say(segment)
+                        self._engine.runAndWait()
+            except Exception as e:
+                print(f"Error in speak function: {e}")
+            finally:
+                self._last_spoken = time.monotonic()
+                self._done()
+
+
+_speech_worker: Optional[SpeechWorker] = None
+
+
+def get_speech_worker() -> SpeechWorker:
+    """Returns the shared speech worker, starting it on first use."""
+    global _speech_worker
+    if _speech_worker is None:
+        _speech_worker = SpeechWorker()
+        _speech_worker.start()
+    return _speech_worker
+
+
+def speak(text: str, wait: bool = True, filler: bool = False):
+    """Speaks text through the shared speech worker.
+
+    With wait=False the text is queued and the call returns immediately.
+    Filler is not counted as the turn's first audio.
+    """
     print(Fore.CYAN + "Jarvis:" + Style.RESET_ALL, text)
+    worker = get_speech_worker()
+    worker.say(text, filler)
+    if wait:
+        worker.wait()
+        # Whatever the microphone heard meanwhile was Friday itself, unless barge-in
+        # or headphones let the user talk over it
+        if _background_listener is not None and _background_listener.ignore_while_speaking:
+            _background_listener.clear()
+
+
+def wait_for_speech(timeout: Optional[float] = None) -> bool:
+    """Blocks until all queued speech has finished."""
+    return get_speech_worker().wait(timeout)
+
+
+def cancel_speech() -> None:
+    """Flushes queued speech and stops the current utterance."""
+    if _speech_worker is not None:
+        _speech_worker.cancel()
+
+
+@dataclass
+class Recognition:
+    """A transcript and how sure the engine that produced it was."""
+    text: str
+    confidence: float
+    engine: str
+
+
+class SpeechEngineError(Exception):
+    """Raised when a speech engine's service failed rather than hearing nothing."""
+
+    def __init__(self, engine: str, error: Exception):
+        super().__init__(f"{engine}: {error}")
+        self.engine = engine
+        self.error = error
+
+
+class SpeechEngine:
+    """A speech-to-text backend.
+
+    recognize() returns None when the engine heard nothing it could
+    transcribe and raises speech_recognition.RequestError when the service
+    itself failed.
+    """
+
+    name = "engine"
+    offline = False
+
+    def __init__(self, timeout: float = STT_TIMEOUT):
+        self.timeout = timeout
+        self._recognizer = None
+
+    @property
+    def recognizer(self):
+        """A recognizer of this engine's own whose requests give up after the engine's timeout."""
+        if self._recognizer is None:
+            recognizer = get_sr().Recognizer()
+            recognizer.operation_timeout = self.timeout
+            self._recognizer = recognizer
+        return self._recognizer
+
+    def recognize(self, audio) -> Optional[Recognition]:
+        raise NotImplementedError
+
+
+class GoogleEngine(SpeechEngine):
+    """The free Google Web Speech API used by recognize_google."""
+
+    name = "google"
+
+    def recognize(self, audio) -> Optional[Recognition]:
+        try:
+            result = self.recognizer.recognize_google(audio, show_all=True)
+        except get_sr().UnknownValueError:
+            return None
+        alternatives = result.get("alternative") if isinstance(result, dict) else None
+        if not alternatives:
+            return None
+        best = max(alternatives, key=lambda alternative: alternative.get("confidence", 0.0))
+        # Google only reports confidence for some results
+        return Recognition(best["transcript"], best.get("confidence", 0.5), self.name)
+
+
+class SphinxEngine(SpeechEngine):
+    """Offline CMU Sphinx decoding (needs pocketsphinx). Sphinx reports no confidence."""
+
+    name = "sphinx"
+    offline = True
+
+    def __init__(self, timeout: float = STT_TIMEOUT, confidence: float = 0.6):
+        super().__init__(timeout)
+        self.confidence = confidence
+
+    def recognize(self, audio) -> Optional[Recognition]:
+        try:
+            text = self.recognizer.recognize_sphinx(audio)
+        except get_sr().UnknownValueError:
+            return None
+        return Recognition(text, self.confidence, self.name) if text.strip() else None
+
+
+class CallableEngine(SpeechEngine):
+    """Wraps a function returning a transcript, or (transcript, confidence), as an engine."""
+
+    def __init__(self, name: str, fn: Callable, timeout: float = STT_TIMEOUT,
+                 confidence: float = 1.0, offline: bool = False):
+        super().__init__(timeout)
+        self.name = name
+        self.offline = offline
+        self._fn = fn
+        self._confidence = confidence
+
+    def recognize(self, audio) -> Optional[Recognition]:
+        result = self._fn(audio)
+        if not result:
+            return None
+        text, confidence = result if isinstance(result, tuple) else (result, self._confidence)
+        return Recognition(text, confidence, self.name) if text else None
+
+
+SPEECH_ENGINES: Dict[str, Callable[[], SpeechEngine]] = {
+    "google": GoogleEngine,
+    "sphinx": SphinxEngine,
+}
+
+
+class VoiceActivityGate:
+    """Cheap local check that captured audio actually contains speech.
+
+    Audio is split into short frames and a frame counts as voiced when its
+    RMS energy is above the threshold (the recognizer's current energy
+    threshold by default). Phrases with less than min_voiced_seconds of
+    voiced audio are rejected.
+    """
+
+    def __init__(self, energy_threshold: Optional[float] = None, min_voiced_seconds: float = 0.25,
+                 frame_ms: int = 30):
+        self.energy_threshold = energy_threshold
+        self.min_voiced_seconds = min_voiced_seconds
+        self.frame_ms = frame_ms
+
+    def voiced_seconds(self, audio) -> float:
+        samples = array("h", audio.get_raw_data(convert_width=2))
+        if sys.byteorder == "big":
+            samples.byteswap()
+        threshold = self.energy_threshold
+        if threshold is None:
+            threshold = get_recognizer().energy_threshold
+        frame = max(1, audio.sample_rate * self.frame_ms // 1000)
+        voiced = 0
+        for start in range(0, len(samples), frame):
+            chunk = samples[start:start + frame]
+            mean_square = sum(sample * sample for sample in chunk) / len(chunk)
+            if mean_square > threshold * threshold:
+                voiced += len(chunk)
+        return voiced / audio.sample_rate
+
+    def accepts(self, audio) -> bool:
+        return self.voiced_seconds(audio) >= self.min_voiced_seconds
+
+
+class RecognitionPipeline:
+    """Runs captured audio through a local gate, optional offline decoding and racing engines.
+
+    1. The voice-activity gate drops noise without any recognizer call.
+    2. The local engine, if any, decodes offline. With a wake word set, phrases
+       whose offline transcript lacks it stop here. A confident offline
+       result is returned without touching the cloud.
+       If the local engine fails, the phrase falls through to the cloud and
+       the wake word is checked on the final transcript instead.
+    3. The remaining engines run concurrently, each with its own timeout; the
+       first result at or above min_confidence wins, otherwise the most
+       confident result that arrived in time is used.
+
+    Every engine call gets its own daemon thread, so a call that hangs past
+    its timeout is abandoned without holding up later phrases.
+    """
+
+    def __init__(self, engines: List[SpeechEngine], gate: Optional[VoiceActivityGate] = None,
+                 local_engine: Optional[SpeechEngine] = None, wake_word: str = "",
+                 min_confidence: float = 0.5, local_accept_confidence: float = 0.9):
+        self.engines = engines
+        self.gate = gate
+        self.local_engine = local_engine
+        self.wake_word = wake_word.lower()
+        self.min_confidence = min_confidence
+        self.local_accept_confidence = local_accept_confidence
+        self.stats: Dict[str, int] = {
+            "phrases": 0, "gated": 0, "wake_rejected": 0, "local_accepted": 0,
+            "engine_calls": 0, "timeouts": 0, "errors": 0,
+        }
+        self._lock = threading.Lock()
+        self._local_failure_reported = False
+
+    def _count(self, key: str, amount: int = 1) -> None:
+        with self._lock:
+            self.stats[key] = self.stats.get(key, 0) + amount
+
+    def _has_wake_word(self, text: str) -> bool:
+        return self.wake_word in _WORD.findall(text.lower())
+
+    def _strip_wake_word(self, result: Recognition) -> Recognition:
+        if not self.wake_word:
+            return result
+        words = [word for word in result.text.split() if "".join(_WORD.findall(word.lower())) != self.wake_word]
+        return Recognition(" ".join(words), result.confidence, result.engine)
+
+    def recognize(self, audio) -> Optional[Recognition]:
+        """Returns the winning transcript, or None if the audio was noise or unrecognized."""
+        self._count("phrases")
+        if self.gate is not None and not self.gate.accepts(audio):
+            self._count("gated")
+            return None
+
+        local_checked = False
+        if self.local_engine is not None:
+            try:
+                local = self._race([self.local_engine], audio)
+                local_checked = True
+            except SpeechEngineError as e:
+                if not self._local_failure_reported:
+                    self._local_failure_reported = True
+                    print(f"Local speech engine failed, using the cloud engines instead: {e}")
+        if local_checked:
+            if self.wake_word and (local is None or not self._has_wake_word(local.text)):
+                self._count("wake_rejected")
+                return None
+            if local is not None and local.confidence >= self.local_accept_confidence:
+                self._count("local_accepted")
+                return self._strip_wake_word(local)
+
+        result = self._race(self.engines, audio)
+        if result is None:
+            return None
+        if self.wake_word and not local_checked and not self._has_wake_word(result.text):
+            self._count("wake_rejected")
+            return None
+        return self._strip_wake_word(result)
+
+    @staticmethod
+    def _submit(engine: SpeechEngine, audio) -> Future:
+        future: Future = Future()
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(engine.recognize(audio))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name=f"friday-stt-{engine.name}", daemon=True).start()
+        return future
+
+    def _race(self, engines: List[SpeechEngine], audio) -> Optional[Recognition]:
+        if not engines:
+            return None
+        started = time.monotonic()
+        deadlines = {}
+        for engine in engines:
+            future = self._submit(engine, audio)
+            deadlines[future] = (engine, started + engine.timeout)
+        self._count("engine_calls", len(engines))
+
+        best: Optional[Recognition] = None
+        errors = []
+        pending = set(deadlines)
+        while pending:
+            now = time.monotonic()
+            for future in [future for future in pending if deadlines[future][1] <= now]:
+                pending.discard(future)
+                future.cancel()
+                self._count("timeouts")
+                print(f"Speech engine {deadlines[future][0].name} timed out.")
+            if not pending:
+                break
+            next_deadline = min(deadlines[future][1] for future in pending)
+            done, pending = wait_for_futures(pending, timeout=max(0.0, next_deadline - now),
+                                             return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    self._count("errors")
+                    errors.append(SpeechEngineError(deadlines[future][0].name, e))
+                    continue
+                if result is None:
+                    continue
+                if result.confidence >= self.min_confidence:
+                    for other in pending:
+                        other.cancel()
+                    return result
+                if best is None or result.confidence > best.confidence:
+                    best = result
+        if best is None and errors and len(errors) == len(engines):
+            raise errors[0]
+        return best
+
+
+def build_recognition_pipeline() -> RecognitionPipeline:
+    """Builds the recognition pipeline from the FRIDAY_* speech settings."""
+    engines = []
+    for name in STT_ENGINES:
+        if name in SPEECH_ENGINES:
+            engines.append(SPEECH_ENGINES[name]())
+        else:
+            print(f"Unknown speech engine {name!r}; available: {', '.join(SPEECH_ENGINES)}")
+    local_engine = None
+    if LOCAL_STT_ENGINE in SPEECH_ENGINES:
+        local_engine = SPEECH_ENGINES[LOCAL_STT_ENGINE]()
+    elif LOCAL_STT_ENGINE:
+        print(f"Unknown local speech engine {LOCAL_STT_ENGINE!r}; available: {', '.join(SPEECH_ENGINES)}")
+    return RecognitionPipeline(
+        engines or [GoogleEngine()],
+        gate=VoiceActivityGate() if VAD_ENABLED else None,
+        local_engine=local_engine,
+        wake_word=WAKE_WORD,
+    )
+
+
+_recognition_pipeline: Optional[RecognitionPipeline] = None
+_recognition_pipeline_lock = threading.Lock()
+
+
+def get_recognition_pipeline() -> RecognitionPipeline:
+    global _recognition_pipeline
+    if _recognition_pipeline is None:
+        get_recognizer()
+        with _recognition_pipeline_lock:
+            if _recognition_pipeline is None:
+                _recognition_pipeline = build_recognition_pipeline()
+    return _recognition_pipeline
+
+
+def transcribe(audio, pipeline: Optional[RecognitionPipeline] = None,
+               spans: Optional[Dict[str, float]] = None) -> Optional[str]:
+    """Transcribes captured audio. Returns None for silence or unrecognized speech.
+
+    The recognition time is added to spans, the phrase's own timings.
+    """
     try:
-        engine = pyttsx3.init()
-        engine.setProperty('rate', 150) # Set speech rate to a slower value
+        with TurnTracer.timed({} if spans is None else spans, "recognize"):
+            result = (pipeline or get_recognition_pipeline()).recognize(audio)
+    except SpeechEngineError as e:
+        speak(f"Could not request results from the {e.engine} speech service; {e.error}", wait=False)
+        return None
+    if result is None or not result.text:
+        # This is not an error, just silence or noise. Return None.
+        return None
+    print(Fore.GREEN + "You said:" + Style.RESET_ALL, result.text)
+    return result.text.lower()
+
+
+class BackgroundListener:
+    """Captures phrases continuously and transcribes them on a separate thread.
+
+    The microphone is calibrated once on start; after that the recognizer's
+    dynamic energy threshold tracks the room. Captured audio and finished
+    transcripts both live in bounded queues; when one is full the oldest
+    entry is dropped.
+    """
+
+    def __init__(self, recognizer=None, source_factory=None, max_pending: int = 8,
+                 phrase_time_limit: Optional[float] = 8, calibration_duration: float = 1.0,
+                 barge_in: bool = BARGE_IN, ignore_while_speaking: bool = IGNORE_WHILE_SPEAKING):
+        self.recognizer = recognizer or get_recognizer()
+        self._source_factory = source_factory or get_sr().Microphone
+        self.phrase_time_limit = phrase_time_limit
+        self.calibration_duration = calibration_duration
+        self.barge_in = barge_in
+        # Barge-in needs to hear the user over Friday's own voice
+        self.ignore_while_speaking = ignore_while_speaking and not barge_in
+        self._epoch = 0
+        self._audio: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._transcripts: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._stop_capture = None
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        source = self._source_factory()
+        with source as calibration_source, get_tracer().span("calibrate", per_turn=False):
+            self.recognizer.adjust_for_ambient_noise(calibration_source, duration=self.calibration_duration)
+        self.recognizer.dynamic_energy_threshold = True
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._recognize_loop, name="speech-recognizer", daemon=True)
+        self._thread.start()
+        self._stop_capture = self.recognizer.listen_in_background(
+            source, self._on_audio, phrase_time_limit=self.phrase_time_limit
+        )
+
+    def stop(self) -> None:
+        if self._stop_capture is not None:
+            self._stop_capture(wait_for_stop=False)
+            self._stop_capture = None
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    def get(self, timeout: Optional[float] = None) -> Optional[str]:
+        """Returns the next transcript, or None if nothing was heard within timeout."""
+        try:
+            text, spans = self._transcripts.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        get_tracer().adopt(spans)
+        return text
+
+    def clear(self) -> None:
+        """Discards everything heard so far, including phrases still being transcribed."""
+        self._epoch += 1
+        for pending in (self._audio, self._transcripts):
+            while True:
+                try:
+                    pending.get_nowait()
+                except queue.Empty:
+                    break
+
+    @staticmethod
+    def _put_latest(q: "queue.Queue", item) -> None:
+        while True:
+            try:
+                q.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    pass
 
-        # Split text into sentences based on punctuation
-        sentences = re.split(r'(?<=[.!?])\s+', text)
+    def _on_audio(self, recognizer, audio) -> None:
+        # The phrase started roughly its own length plus the closing pause ago
+        listened = len(audio.frame_data) / float(audio.sample_rate * audio.sample_width)
+        listened += getattr(recognizer, "pause_threshold", 0.8)
+        if self.ignore_while_speaking and _speech_worker is not None:
+            if _speech_worker.spoke_since(time.monotonic() - listened):
+                return
+        self._put_latest(self._audio, (self._epoch, audio, {"listen": listened * 1000}))
 
-        for i, sentence in enumerate(sentences):
-            if not sentence.strip(): # Skip empty sentences
+    def _recognize_loop(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                epoch, audio, spans = self._audio.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            text = transcribe(audio, spans=spans)
+            if not text or epoch != self._epoch:
                 continue
+            if self.barge_in:
+                cancel_speech()
+            self._put_latest(self._transcripts, (text, spans))
 
-            # Remove punctuation from the current sentence for speaking
-            text_to_speak_segment = sentence.translate(str.maketrans('', '', string.punctuation)).strip()
 
-            if text_to_speak_segment: # Only speak if there's content
-                engine.say(text_to_speak_segment)
-                engine.runAndWait()
+_background_listener: Optional[BackgroundListener] = None
 
-                # Add a short pause between sentences, but not after the last one
-                if i < len(sentences) - 1:
-                    time.sleep(0.5) # Adjust pause duration as needed
 
-    except Exception as e:
-        print(f"Error in speak function: {e}")
+def start_background_listening() -> None:
+    """Calibrates the microphone once and starts always-on capture."""
+    global _background_listener
+    if _background_listener is None:
+        listener = BackgroundListener()
+        listener.start()
+        _background_listener = listener
+
+
+def stop_background_listening() -> None:
+    global _background_listener
+    if _background_listener is not None:
+        _background_listener.stop()
+        _background_listener = None
+
 
+def listen(timeout: float = 6, fresh: bool = False) -> Optional[str]:
+    """Listens for voice input and returns the transcribed text.
 
-def listen() -> Optional[str]:
-    """Listens for voice input and returns the transcribed text."""
+    With fresh=True anything heard before the call is discarded, so a
+    follow-up question only gets an answer spoken after it was asked.
+    """
+    if _background_listener is not None:
+        if fresh:
+            _background_listener.clear()
+        return _background_listener.get(timeout=timeout)
+    sr = get_sr()
+    r = get_recognizer()
+    spans: Dict[str, float] = {}
     with sr.Microphone() as source:
         print(Fore.YELLOW + "Listening..." + Style.RESET_ALL)
-        r.adjust_for_ambient_noise(source, duration=1)
+        # Calibrating on every turn is part of what the user waits for
+        with TurnTracer.timed(spans, "calibrate"):
+            r.adjust_for_ambient_noise(source, duration=1)
         try:
-            audio = r.listen(source, timeout=6, phrase_time_limit=8)
-            text = r.recognize_google(audio)
-            print(Fore.GREEN + "You said:" + Style.RESET_ALL, text)
-            return text.lower()
-        except sr.UnknownValueError:
-            # This is not an error, just silence. Return None.
-            return None
-        except sr.RequestError as e:
-            speak(f"Could not request results from Google Speech Recognition service; {e}")
-            return None
+            with TurnTracer.timed(spans, "listen"):
+                audio = r.listen(source, timeout=timeout, phrase_time_limit=8)
         except sr.WaitTimeoutError:
             # This is not an error, just silence. Return None.
             return None
+    text = transcribe(audio, spans=spans)
+    if text:
+        get_tracer().adopt(spans)
+    return text
+
+
+# ------------------------------
+# HTTP
+# ------------------------------
+
+HTTP_POOL_SIZE = int(os.getenv("FRIDAY_HTTP_POOL_SIZE", "8"))
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+
+def get_http_session():
+    """Returns the pooled requests.Session shared by all outbound HTTP, creating it on first use."""
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            requests = get_requests()
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=1
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _http_session = session
+    return _http_session
+
+
+# ------------------------------
+# Downloads
+# ------------------------------
+
+DOWNLOAD_DIR = os.getenv("DOWNLOAD_DIR", ".")
+DOWNLOAD_CONNECTIONS = int(os.getenv("DOWNLOAD_CONNECTIONS", "4"))
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", str(4 * 1024 * 1024)))
+
+
+class DownloadError(Exception):
+    """Raised when a download cannot be completed."""
+
+
+class RangedDownloader:
+    """Downloads a URL with several parallel HTTP range requests into a preallocated file.
+
+    The file is written to "<path>.part" and its progress is recorded in
+    "<path>.part.json" after every finished chunk, so running the same
+    download again skips what is already on disk. on_progress is called
+    as on_progress(bytes_done, total_bytes, bytes_per_second); an exception
+    raised from it stops the download and leaves the resume state in place.
+    Servers without Range support fall back to a single sequential stream.
+    """
+
+    _BLOCK_SIZE = 64 * 1024
+
+    def __init__(self, url: str, path: str, connections: int = DOWNLOAD_CONNECTIONS,
+                 chunk_size: int = DOWNLOAD_CHUNK_SIZE, session=None,
+                 on_progress: Optional[Callable[[int, int, float], None]] = None,
+                 retries: int = 3, timeout: float = 30):
+        self.url = url
+        self.path = path
+        self.part_path = path + ".part"
+        self.state_path = path + ".part.json"
+        self.connections = max(1, connections)
+        self.chunk_size = chunk_size
+        self.on_progress = on_progress
+        self.retries = retries
+        self.timeout = timeout
+        self._session = session
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._done_chunks: set = set()
+        self._total = 0
+        self._downloaded = 0
+        self._session_bytes = 0
+        self._started = 0.0
+
+    @property
+    def session(self):
+        return self._session or get_http_session()
+
+    def download(self) -> str:
+        """Downloads the file and returns its final path."""
+        size, ranged = self._probe()
+        self._total = size
+        self._started = time.monotonic()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        if ranged and size:
+            self._download_ranged(size)
+        else:
+            self._download_single()
+        os.replace(self.part_path, self.path)
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+        return self.path
+
+    def _probe(self) -> Tuple[int, bool]:
+        """Returns the file size and whether the server honours range requests."""
+        response = self.session.get(self.url, headers={"Range": "bytes=0-0"}, stream=True, timeout=self.timeout)
+        try:
+            response.raise_for_status()
+            if response.status_code == 206:
+                content_range = response.headers.get("Content-Range", "")
+                total = content_range.rpartition("/")[2]
+                if total.isdigit():
+                    return int(total), True
+            return int(response.headers.get("Content-Length") or 0), False
+        finally:
+            response.close()
+
+    def _load_state(self, size: int) -> None:
+        self._done_chunks = set()
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        if (state.get("size") == size and state.get("chunk_size") == self.chunk_size
+                and os.path.exists(self.part_path) and os.path.getsize(self.part_path) == size):
+            self._done_chunks = set(state.get("done", []))
+
+    def _save_state(self, size: int) -> None:
+        state = {"url": self.url, "size": size, "chunk_size": self.chunk_size, "done": sorted(self._done_chunks)}
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _download_ranged(self, size: int) -> None:
+        self._load_state(size)
+        if not self._done_chunks:
+            with open(self.part_path, "wb") as f:
+                f.truncate(size)
+
+        chunks = []
+        for index, start in enumerate(range(0, size, self.chunk_size)):
+            end = min(start + self.chunk_size, size) - 1
+            if index in self._done_chunks:
+                self._downloaded += end - start + 1
+            else:
+                chunks.append((index, start, end))
+        self._report()
+
+        self._stop.clear()
+        with ThreadPoolExecutor(max_workers=self.connections, thread_name_prefix="friday-download") as executor:
+            futures = [executor.submit(self._fetch_chunk, size, *chunk) for chunk in chunks]
+            try:
+                for future in futures:
+                    future.result()
+            except BaseException:
+                self._stop.set()
+                for future in futures:
+                    future.cancel()
+                raise
+
+    def _fetch_chunk(self, size: int, index: int, start: int, end: int) -> None:
+        requests = get_requests()
+        for attempt in range(self.retries + 1):
+            written = 0
+            try:
+                response = self.session.get(
+                    self.url, headers={"Range": f"bytes={start}-{end}"}, stream=True, timeout=self.timeout
+                )
+                with response, open(self.part_path, "r+b") as f:
+                    if response.status_code != 206:
+                        raise DownloadError(f"Expected a partial response, got HTTP {response.status_code}")
+                    f.seek(start)
+                    for block in response.iter_content(self._BLOCK_SIZE):
+                        if self._stop.is_set():
+                            raise DownloadError("Download stopped")
+                        f.write(block)
+                        written += len(block)
+                        self._advance(len(block))
+                if written != end - start + 1:
+                    raise DownloadError(f"Chunk {index} ended after {written} of {end - start + 1} bytes")
+                with self._lock:
+                    self._done_chunks.add(index)
+                    self._save_state(size)
+                return
+            except requests.RequestException as e:
+                self._advance(-written)
+                if attempt == self.retries or self._stop.is_set():
+                    raise DownloadError(f"Chunk {index} failed: {e}") from e
+                time.sleep(0.5 * (attempt + 1))
+            except DownloadError:
+                self._advance(-written)
+                if attempt == self.retries or self._stop.is_set():
+                    raise
+
+    def _download_single(self) -> None:
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+        response = self.session.get(self.url, stream=True, timeout=self.timeout)
+        with response, open(self.part_path, "wb") as f:
+            response.raise_for_status()
+            for block in response.iter_content(self._BLOCK_SIZE):
+                f.write(block)
+                self._advance(len(block))
+
+    def _advance(self, nbytes: int) -> None:
+        with self._lock:
+            self._downloaded += nbytes
+            self._session_bytes += nbytes
+        self._report()
+
+    def _report(self) -> None:
+        if self.on_progress is None:
+            return
+        elapsed = time.monotonic() - self._started
+        rate = self._session_bytes / elapsed if elapsed > 0 else 0.0
+        self.on_progress(self._downloaded, self._total, rate)
+
+
+# ------------------------------
+# Background Jobs
+# ------------------------------
+
+JOB_WORKERS = int(os.getenv("FRIDAY_JOB_WORKERS", "2"))
+
+
+class JobCancelled(Exception):
+    """Raised inside a job once it has been asked to stop."""
+
+
+class Job:
+    """A long-running command tracked by the JobManager."""
+
+    def __init__(self, job_id: int, name: str, description: str):
+        self.id = job_id
+        self.name = name
+        self.description = description
+        self.status = "queued"
+        self.progress: Optional[float] = None
+        self.detail = ""
+        self.future = None
+        self._cancel = threading.Event()
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    def request_cancel(self) -> None:
+        self._cancel.set()
+
+    def check_cancelled(self) -> None:
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def report(self, progress: Optional[float] = None, detail: Optional[str] = None) -> None:
+        """Updates progress (0 to 1) and raises JobCancelled if the job should stop."""
+        if progress is not None:
+            self.progress = max(0.0, min(1.0, progress))
+        if detail is not None:
+            self.detail = detail
+        self.check_cancelled()
+
+    def summary(self) -> str:
+        text = f"{self.description} is {self.status}"
+        if self.status == "running" and self.progress is not None:
+            text += f", {int(self.progress * 100)} percent done"
+        return text
+
+
+class JobManager:
+    """Runs long commands on a bounded thread pool so the main loop keeps listening.
+
+    Jobs are plain callables taking the Job as their first argument; they
+    report progress through it and stop when job.report() or
+    job.check_cancelled() raises JobCancelled. Completion and failure are
+    announced through speech.
+    """
+
+    def __init__(self, max_workers: int = JOB_WORKERS, announce: Optional[Callable[[str], None]] = None):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="friday-job")
+        self._jobs: "OrderedDict[int, Job]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._announce = announce or (lambda text: speak(text, wait=False))
+
+    def submit(self, name: str, fn: Callable, *args, description: Optional[str] = None,
+               done_message: Optional[str] = None, error_message: Optional[str] = None) -> Job:
+        with self._lock:
+            job = Job(next(self._ids), name, description or name)
+            self._jobs[job.id] = job
+        job.future = self._executor.submit(self._run, job, fn, args, done_message, error_message)
+        return job
+
+    def _run(self, job: Job, fn: Callable, args: tuple, done_message: Optional[str],
+             error_message: Optional[str]) -> None:
+        if job.cancel_requested:
+            job.status = "cancelled"
+            return
+        job.status = "running"
+        try:
+            fn(job, *args)
+        except JobCancelled:
+            job.status = "cancelled"
+            self._announce(f"The {job.description} was cancelled.")
+        except Exception as e:
+            job.status = "failed"
+            self._announce(error_message or f"Sorry, the {job.description} failed.")
+            print(f"Job {job.id} ({job.description}) failed: {e}")
+        else:
+            job.status = "done"
+            job.progress = 1.0
+            self._announce(done_message or f"The {job.description} is complete.")
+
+    def get(self, job_id: int) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def active(self) -> List[Job]:
+        return [job for job in self.jobs() if job.active]
+
+    def cancel(self, name: Optional[str] = None) -> List[Job]:
+        """Cancels active jobs with the given name, or all active jobs. Returns the jobs cancelled."""
+        cancelled = []
+        for job in self.active():
+            if name is None or job.name == name:
+                job.request_cancel()
+                if job.future is not None and job.future.cancel():
+                    job.status = "cancelled"
+                cancelled.append(job)
+        return cancelled
+
+    def shutdown(self) -> None:
+        self.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_job_manager: Optional[JobManager] = None
+
+
+def get_job_manager() -> JobManager:
+    global _job_manager
+    if _job_manager is None:
+        _job_manager = JobManager()
+    return _job_manager
+
+
+def report_jobs() -> None:
+    """Says what is running in the background."""
+    active = get_job_manager().active()
+    if not active:
+        speak("Nothing is running right now.")
+        return
+    speak(". ".join(job.summary().capitalize() for job in active) + ".")
+
+
+def cancel_jobs(text: str) -> None:
+    """Cancels the background jobs named in text, or every job if none is named."""
+    manager = get_job_manager()
+    words = set(_WORD.findall(text.lower()))
+    names = {job.name for job in manager.active() if job.name in words}
+    cancelled = []
+    if names:
+        for name in names:
+            cancelled.extend(manager.cancel(name))
+    else:
+        cancelled = manager.cancel()
+    if not cancelled:
+        speak("There is nothing to cancel.")
+    elif len(cancelled) == 1:
+        speak(f"Cancelling the {cancelled[0].description}.", wait=False)
+    else:
+        speak(f"Cancelling {len(cancelled)} jobs.", wait=False)
 
 
 # ------------------------------
@@ -128,7 +1404,7 @@ def listen() -> Optional[str]:
 # ------------------------------
 
 def open_notepad() -> None:
-    speak("Opening Notepad.")
+    speak("Opening Notepad.", wait=False)
     try:
         subprocess.Popen(["notepad.exe"])
     except Exception as e:
@@ -136,7 +1412,7 @@ def open_notepad() -> None:
         print(f"Error opening notepad: {e}")
 
 def open_calculator() -> None:
-    speak("Opening Calculator.")
+    speak("Opening Calculator.", wait=False)
     try:
         subprocess.Popen(["calc.exe"])
     except Exception as e:
@@ -144,7 +1420,7 @@ def open_calculator() -> None:
         print(f"Error opening calculator: {e}")
 
 def open_browser() -> None:
-    speak("Opening browser.")
+    speak("Opening browser.", wait=False)
     try:
         webbrowser.open("about:blank")
     except Exception as e:
@@ -153,7 +1429,7 @@ def open_browser() -> None:
 
 def confirm_and_shutdown() -> None:
     speak("Are you sure you want to shutdown? Say yes to confirm.")
-    response = listen()
+    response = listen(fresh=True)
     if response and "yes" in response:
         speak("Shutting down.")
         try:
@@ -171,28 +1447,131 @@ def open_youtube_search(query: str) -> None:
     url = f"https://www.youtube.com/results?search_query={formatted_query}"
     webbrowser.open(url)
 
+def _download_video_job(job: Job, url: str) -> None:
+    def on_progress(done, total, rate):
+        job.report(done / total if total else None)
+
+    yt = get_youtube_class()(url)
+    stream = yt.streams.get_highest_resolution()
+    job.report(0.0, stream.default_filename)
+    path = os.path.join(DOWNLOAD_DIR, stream.default_filename)
+    RangedDownloader(stream.url, path, on_progress=on_progress).download()
+
+
 def download_youtube_video() -> None:
-    if YouTube is None:
+    if get_youtube_class() is None:
         speak("The pytube library is not installed. Please install it to download videos.")
         return
     speak("Please say the YouTube URL you want to download.")
-    url = listen() # You might want a more robust way to get a URL
+    url = listen(fresh=True) # You might want a more robust way to get a URL
     if not url:
         speak("I didn't catch the URL. Please try again.")
         return
-    try:
-        speak("Starting download. This may take a moment.")
-        yt = YouTube(url)
-        stream = yt.streams.get_highest_resolution()
-        stream.download()
-        speak("Download completed successfully.")
-    except Exception as e:
-        speak("Sorry, I could not download that video.")
-        print(f"YouTube download error: {e}")
+    speak("Starting download. I'll let you know when it's done.", wait=False)
+    get_job_manager().submit(
+        "download", _download_video_job, url,
+        description="video download",
+        done_message="Download completed successfully.",
+        error_message="Sorry, I could not download that video.",
+    )
+
+
+WEATHER_BASE_URL = os.getenv("OPENWEATHER_BASE_URL", "http://api.openweathermap.org/data/2.5/weather")
+# Seconds a weather report stays fresh
+WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", "600"))
+# Keep the weather for CITY_NAME warm in the background (polls OpenWeather while running)
+WEATHER_PREFETCH = os.getenv("WEATHER_PREFETCH", "0") == "1"
+
+
+def fetch_weather(city_name: str, api_key: str, session=None, base_url: str = WEATHER_BASE_URL) -> str:
+    """Fetches the current weather for city_name and returns it as a sentence."""
+    session = session or get_http_session()
+    response = session.get(base_url, params={"q": city_name, "appid": api_key, "units": "metric"}, timeout=10)
+    response.raise_for_status()
+    data = response.json()
+    weather = data.get("weather", [{}])[0].get("description", "unknown")
+    temp_c = data.get("main", {}).get("temp")
+    return f"The current weather in {city_name} is {weather}, with a temperature of {temp_c} degrees Celsius."
+
+
+class WeatherCache:
+    """Per-city weather reports that stay fresh for ttl seconds.
+
+    start_refresher() keeps one city warm from a background thread so a
+    weather request can be answered from memory.
+    """
+
+    def __init__(self, api_key: str, ttl: float = WEATHER_CACHE_TTL, session=None,
+                 base_url: str = WEATHER_BASE_URL):
+        self.api_key = api_key
+        self.ttl = ttl
+        self.base_url = base_url
+        self._session = session
+        self._entries: Dict[str, Tuple[float, str]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+
+    def get(self, city_name: str) -> Optional[str]:
+        """Returns the cached report for city_name if it is still fresh."""
+        with self._lock:
+            entry = self._entries.get(city_name.lower())
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+        return None
+
+    def fetch(self, city_name: str) -> str:
+        """Fetches a new report for city_name and caches it."""
+        message = fetch_weather(city_name, self.api_key, self._session, self.base_url)
+        with self._lock:
+            self._entries[city_name.lower()] = (time.monotonic(), message)
+        return message
+
+    def start_refresher(self, city_name: str, interval: Optional[float] = None) -> None:
+        """Refreshes city_name in the background before its cached report expires."""
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+        interval = interval or max(self.ttl * 0.8, 1.0)
+        self._stop.clear()
+        self._refresher = threading.Thread(
+            target=self._refresh_loop, args=(city_name, interval), name="weather-refresher", daemon=True
+        )
+        self._refresher.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._refresher is not None:
+            self._refresher.join(timeout=2)
+
+    def _refresh_loop(self, city_name: str, interval: float) -> None:
+        while not self._stop.is_set():
+            try:
+                self.fetch(city_name)
+            except Exception as e:
+                print(f"Weather prefetch failed: {e}")
+            self._stop.wait(interval)
+
+
+_weather_cache: Optional[WeatherCache] = None
+
+
+def get_weather_cache(api_key: str) -> WeatherCache:
+    global _weather_cache
+    if _weather_cache is None or _weather_cache.api_key != api_key:
+        _weather_cache = WeatherCache(api_key)
+    return _weather_cache
+
+
+def start_weather_prefetch() -> None:
+    """Keeps the default city's weather warm if the weather feature is configured."""
+    api_key = os.getenv("OPENWEATHER_API_KEY")
+    if not api_key or not WEATHER_PREFETCH or get_requests() is None:
+        return
+    get_weather_cache(api_key).start_refresher(os.getenv("CITY_NAME", "Indore"))
 
 
 def fetch_weather_message() -> None:
-    if requests is None:
+    if get_requests() is None:
         speak("The requests library is not installed. Cannot fetch weather.")
         return
     api_key = os.getenv("OPENWEATHER_API_KEY")
@@ -201,23 +1580,259 @@ def fetch_weather_message() -> None:
         speak("The OpenWeather API key is not configured.")
         return
 
-    speak("Fetching the current weather.")
-    base_url = "http://api.openweathermap.org/data/2.5/weather"
-    try:
-        response = requests.get(base_url, params={"q": city_name, "appid": api_key, "units": "metric"}, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        weather = data.get("weather", [{}])[0].get("description", "unknown")
-        temp_c = data.get("main", {}).get("temp")
-        message = f"The current weather in {city_name} is {weather}, with a temperature of {temp_c} degrees Celsius."
-        speak(message)
-    except Exception as e:
-        speak("Sorry, I couldn't fetch the weather information.")
-        print(f"Weather fetch failed: {e}")
+    cache = get_weather_cache(api_key)
+    message = cache.get(city_name)
+    if message is None:
+        speak("Fetching the current weather.", wait=False)
+        try:
+            message = cache.fetch(city_name)
+        except Exception as e:
+            speak("Sorry, I couldn't fetch the weather information.")
+            print(f"Weather fetch failed: {e}")
+            return
+    speak(message)
+
+
+# "http" submits the login form with requests, "browser" always uses Selenium,
+# "auto" tries plain HTTP first and falls back to the browser for complex forms
+LOGIN_MODE = os.getenv("LOGIN_MODE", "auto").lower()
+LOGIN_HEADLESS = os.getenv("LOGIN_HEADLESS", "1") != "0"
+LOGIN_TIMEOUT = float(os.getenv("LOGIN_TIMEOUT", "15"))
+# Start a browser in the background at startup so the first login skips the cold start
+PREWARM_BROWSER = os.getenv("FRIDAY_PREWARM_BROWSER", "0") == "1"
+
+
+class LoginError(Exception):
+    """Raised when a login attempt cannot be completed."""
+
+
+class BrowserPool:
+    """Keeps WebDriver sessions warm and hands them out for reuse across commands.
+
+    At most size drivers exist at once. A reused driver starts without the
+    previous user's cookies. A driver that raised while in use, or no longer
+    responds, is quit and replaced on the next checkout.
+    """
+
+    def __init__(self, size: int = 1, headless: bool = LOGIN_HEADLESS, driver_factory=None):
+        self.headless = headless
+        self._driver_factory = driver_factory or self._create_driver
+        self._idle: list = []
+        self._slots = threading.Semaphore(size)
+        self._lock = threading.Lock()
+
+    def _create_driver(self):
+        webdriver = get_selenium().webdriver
+        options = webdriver.EdgeOptions()
+        if self.headless:
+            options.add_argument("--headless=new")
+        return webdriver.Edge(options=options)
+
+    @staticmethod
+    def _reset(driver) -> bool:
+        """Drops the previous login's cookies. Returns False if the driver no longer responds."""
+        try:
+            driver.current_url
+            driver.delete_all_cookies()
+            return True
+        except Exception:
+            return False
+
+    @contextmanager
+    def driver(self):
+        """Checks out a warm driver, starting a new one if none is available."""
+        self._slots.acquire()
+        driver = None
+        healthy = False
+        try:
+            with self._lock:
+                driver = self._idle.pop() if self._idle else None
+            if driver is not None and not self._reset(driver):
+                self._quit(driver)
+                driver = None
+            if driver is None:
+                driver = self._driver_factory()
+            yield driver
+            healthy = True
+        finally:
+            if driver is not None:
+                if healthy:
+                    with self._lock:
+                        self._idle.append(driver)
+                else:
+                    self._quit(driver)
+            self._slots.release()
+
+    def prewarm(self) -> None:
+        """Starts a driver in the background so the first checkout is instant."""
+        def warm():
+            try:
+                with self.driver():
+                    pass
+            except Exception as e:
+                print(f"Browser prewarm failed: {e}")
+        threading.Thread(target=warm, name="browser-prewarm", daemon=True).start()
+
+    @staticmethod
+    def _quit(driver) -> None:
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def close(self) -> None:
+        with self._lock:
+            drivers, self._idle = self._idle, []
+        for driver in drivers:
+            self._quit(driver)
+
+
+_browser_pool: Optional[BrowserPool] = None
+
+
+def get_browser_pool() -> BrowserPool:
+    global _browser_pool
+    if _browser_pool is None:
+        _browser_pool = BrowserPool()
+    return _browser_pool
+
+
+class _FormParser(HTMLParser):
+    """Collects the forms on a page with their attributes and input fields."""
+
+    def __init__(self):
+        super().__init__()
+        self.forms: list = []
+        self._current: Optional[dict] = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {name: value or "" for name, value in attrs}
+        if tag == "form":
+            self._current = {"attrs": attrs, "inputs": []}
+            self.forms.append(self._current)
+        elif tag in ("input", "button", "select", "textarea") and self._current is not None:
+            self._current["inputs"].append(dict(attrs, tag=tag))
+
+    def handle_endtag(self, tag):
+        if tag == "form":
+            self._current = None
+
+
+def _find_login_form(html: str, username_field_id: str, password_field_id: str) -> Optional[dict]:
+    """Returns the form holding both login fields, or None if there is no simple one."""
+    parser = _FormParser()
+    parser.feed(html)
+    for form in parser.forms:
+        by_id = {field.get("id"): field for field in form["inputs"] if field.get("id")}
+        username_field = by_id.get(username_field_id)
+        password_field = by_id.get(password_field_id)
+        if username_field is None or password_field is None:
+            continue
+        # Forms submitted by script or with unnamed fields need a real browser
+        if form["attrs"].get("onsubmit") or not (username_field.get("name") and password_field.get("name")):
+            return None
+        return form
+    return None
+
+
+def login_via_http(url: str, username: str, password: str, username_field_id: str,
+                   password_field_id: str, session=None) -> bool:
+    """Submits a simple login form with requests.
+
+    Returns False when the page has no simple form and needs a browser.
+    Raises LoginError if the form comes back after submitting. Without a
+    session a new one is used, so cookies from an earlier login never make
+    the form disappear.
+    """
+    if session is None:
+        with get_requests().Session() as fresh:
+            return login_via_http(url, username, password, username_field_id, password_field_id, fresh)
+    page = session.get(url, timeout=LOGIN_TIMEOUT)
+    page.raise_for_status()
+    form = _find_login_form(page.text, username_field_id, password_field_id)
+    if form is None:
+        return False
+
+    data = {}
+    for field in form["inputs"]:
+        name = field.get("name")
+        if not name or field.get("type", "").lower() in ("submit", "button", "reset", "image"):
+            continue
+        if field.get("type", "").lower() in ("checkbox", "radio") and "checked" not in field:
+            continue
+        if field.get("id") == username_field_id:
+            data[name] = username
+        elif field.get("id") == password_field_id:
+            data[name] = password
+        else:
+            data[name] = field.get("value", "")
+
+    action = urljoin(page.url, form["attrs"].get("action") or page.url)
+    if form["attrs"].get("method", "get").lower() == "post":
+        response = session.post(action, data=data, timeout=LOGIN_TIMEOUT)
+    else:
+        response = session.get(action, params=data, timeout=LOGIN_TIMEOUT)
+    response.raise_for_status()
+    if _find_login_form(response.text, username_field_id, password_field_id) is not None:
+        raise LoginError("The login form was shown again after submitting.")
+    return True
+
+
+def login_via_browser(driver, url: str, username: str, password: str, username_field_id: str,
+                      password_field_id: str, job: Optional[Job] = None) -> None:
+    """Fills in and submits the login form, waiting on page conditions instead of fixed sleeps."""
+    selenium = get_selenium()
+    By, EC = selenium.By, selenium.EC
+    wait = selenium.WebDriverWait(driver, LOGIN_TIMEOUT)
+    driver.get(url)
+    username_el = wait.until(EC.element_to_be_clickable((By.ID, username_field_id)))
+    password_el = wait.until(EC.element_to_be_clickable((By.ID, password_field_id)))
+    if job is not None:
+        job.check_cancelled()
+
+    start_url = driver.current_url
+    username_el.clear()
+    username_el.send_keys(username)
+    password_el.clear()
+    password_el.send_keys(password)
+    password_el.send_keys(selenium.Keys.ENTER)
+
+    # Wait for login to process: the form is replaced or the page navigates away
+    wait.until(EC.any_of(EC.staleness_of(password_el), EC.url_changes(start_url)))
+
+
+def _login_job(job: Job, url: str, username: str, password: str) -> None:
+    username_field_id = os.getenv("LOGIN_USERNAME_FIELD_ID", "username")
+    password_field_id = os.getenv("LOGIN_PASSWORD_FIELD_ID", "password")
+
+    requests = get_requests()
+    if LOGIN_MODE in ("http", "auto") and requests is not None:
+        try:
+            if login_via_http(url, username, password, username_field_id, password_field_id):
+                return
+        except requests.RequestException as e:
+            # Sites that block plain HTTP clients often still work in a real browser
+            if LOGIN_MODE == "http":
+                raise
+            print(f"HTTP login failed, retrying in the browser: {e}")
+        else:
+            if LOGIN_MODE == "http":
+                raise LoginError("The login form is too complex to submit without a browser.")
+    job.check_cancelled()
+    if get_selenium() is None:
+        raise LoginError("Selenium is not installed.")
+    with get_browser_pool().driver() as driver:
+        login_via_browser(driver, url, username, password, username_field_id, password_field_id, job)
+
+
+def start_browser_prewarm() -> None:
+    """Warms up the browser pool if logins may need Selenium."""
+    if PREWARM_BROWSER and LOGIN_MODE != "http" and os.getenv("LOGIN_URL") and get_selenium() is not None:
+        get_browser_pool().prewarm()
 
 
 def perform_login_via_selenium() -> None:
-    if webdriver is None:
+    if get_selenium() is None and (LOGIN_MODE == "browser" or get_requests() is None):
         speak("Selenium is not installed. Please install it to use this feature.")
         return
 
@@ -229,91 +1844,753 @@ def perform_login_via_selenium() -> None:
         speak("Login is not configured. Please set the required environment variables.")
         return
 
-    speak("Attempting to log in.")
-    try:
-        driver = webdriver.Edge()
-        driver.get(url)
-        time.sleep(2) # Wait for page to load
+    speak("Attempting to log in.", wait=False)
+    get_job_manager().submit(
+        "login", _login_job, url, username, password,
+        description="login",
+        done_message="Login attempted.",
+        error_message="Sorry, the login process failed.",
+    )
 
-        username_field_id = os.getenv("LOGIN_USERNAME_FIELD_ID", "username")
-        password_field_id = os.getenv("LOGIN_PASSWORD_FIELD_ID", "password")
 
-        username_el = driver.find_element(By.ID, username_field_id)
-        password_el = driver.find_element(By.ID, password_field_id)
+# ------------------------------
+# Command Registry
+# ------------------------------
 
-        username_el.clear()
-        username_el.send_keys(username)
-        password_el.clear()
-        password_el.send_keys(password)
-        password_el.send_keys(Keys.ENTER)
+_WORD = re.compile(r"[a-z0-9]+")
 
-        time.sleep(3) # Wait for login to process
-        speak("Login attempted.")
-        driver.quit()
-    except Exception as e:
-        speak("Sorry, the login process failed.")
-        print(f"Selenium login error: {e}")
 
+@dataclass
+class Command:
+    """A hardcoded command and the words that trigger it.
 
-def execute_hardcoded_command(text: str) -> bool:
-    """Checks for and executes a hardcoded command. Returns True if a command was executed."""
-    if "notepad" in text:
-        open_notepad()
-        return True
-    if "calculator" in text or "calc" in text:
-        open_calculator()
-        return True
-    if "browser" in text:
-        open_browser()
-        return True
-    if "shutdown" in text:
-        confirm_and_shutdown()
-        return True
-    if "youtube" in text and "download" not in text:
-        open_youtube_search(text)
-        return True
-    if "download" in text and "video" in text:
-        download_youtube_video()
-        return True
-    if "weather" in text:
-        fetch_weather_message()
+    keywords: any one of these words or phrases of up to three words triggers the command.
+    requires: every entry must be present; an entry may list alternatives as "a|b".
+    excludes: the command never matches if one of these is present.
+    shape: if set, the whole transcript (lowercase words joined by single
+        spaces) must match this pattern, so "exit" fires for "please exit now"
+        but not inside "what is the exit velocity of earth".
+    """
+    name: str
+    handler: Callable
+    keywords: Tuple[str, ...] = ()
+    requires: Tuple[str, ...] = ()
+    excludes: Tuple[str, ...] = ()
+    priority: int = 0
+    pass_text: bool = False
+    shape: Optional[re.Pattern] = None
+
+    def run(self, text: str) -> None:
+        if self.pass_text:
+            self.handler(text)
+        else:
+            self.handler()
+
+
+class CommandRegistry:
+    """Matches transcripts to commands with a keyword index in a single pass.
+
+    Words are matched whole, so "calc" no longer fires inside "calculus".
+    When several commands match, the highest priority wins, then the one with
+    the most keyword hits, then the one registered first.
+    """
+
+    _KEYWORD, _REQUIRED, _EXCLUDED = 0, 1, 2
+
+    def __init__(self):
+        self._commands: List[Command] = []
+        self._index: Dict[str, List[Tuple[int, int, int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._commands)
+
+    def __iter__(self):
+        return iter(self._commands)
+
+    def register(self, name: str, handler: Callable, keywords: Tuple[str, ...] = (),
+                 requires: Tuple[str, ...] = (), excludes: Tuple[str, ...] = (),
+                 priority: int = 0, pass_text: bool = False, shape: Optional[re.Pattern] = None) -> Command:
+        if not (keywords or requires):
+            raise ValueError(f"Command {name!r} needs at least one keyword or required word.")
+        command = Command(name, handler, tuple(keywords), tuple(requires), tuple(excludes), priority,
+                          pass_text, shape)
+        position = len(self._commands)
+        self._commands.append(command)
+        for word in command.keywords:
+            self._add(word, (position, self._KEYWORD, 0))
+        for slot, alternatives in enumerate(command.requires):
+            for word in alternatives.split("|"):
+                self._add(word, (position, self._REQUIRED, slot))
+        for word in command.excludes:
+            self._add(word, (position, self._EXCLUDED, 0))
+        return command
+
+    def _add(self, word: str, entry: Tuple[int, int, int]) -> None:
+        self._index.setdefault(" ".join(_WORD.findall(word.lower())), []).append(entry)
+
+    def match(self, text: str) -> Optional[Command]:
+        """Returns the best matching command for text, or None."""
+        hits: Dict[int, int] = {}
+        slots: Dict[int, int] = {}
+        excluded = set()
+        words = _WORD.findall(text.lower())
+        for i, word in enumerate(words):
+            keys = [word]
+            if i >= 1:
+                keys.append(f"{words[i - 1]} {word}")
+            if i >= 2:
+                keys.append(f"{words[i - 2]} {words[i - 1]} {word}")
+            for key in keys:
+                for position, role, slot in self._index.get(key, ()):
+                    if role == self._KEYWORD:
+                        hits[position] = hits.get(position, 0) + 1
+                    elif role == self._REQUIRED:
+                        slots[position] = slots.get(position, 0) | (1 << slot)
+                    else:
+                        excluded.add(position)
+
+        best = None
+        best_score = None
+        for position in set(hits) | set(slots):
+            command = self._commands[position]
+            if position in excluded:
+                continue
+            if command.shape is not None and not command.shape.fullmatch(" ".join(words)):
+                continue
+            if command.keywords and position not in hits:
+                continue
+            if slots.get(position, 0) != (1 << len(command.requires)) - 1:
+                continue
+            score = (command.priority, hits.get(position, 0), -position)
+            if best_score is None or score > best_score:
+                best, best_score = command, score
+        return best
+
+    def dispatch(self, text: str) -> bool:
+        """Runs the best matching command. Returns True if one was executed."""
+        command = self.match(text)
+        if command is None:
+            return False
+        command.run(text)
         return True
-    if "login" in text:
-        perform_login_via_selenium()
+
+
+def say_goodbye() -> None:
+    speak(random.choice(GOODBYES))
+
+
+EXIT_COMMAND = "exit"
+# A bare "exit" or "quit", optionally addressed to Friday and softened with "please" or "now"
+_EXIT_SHAPE = re.compile(
+    r"(?:(?:hey|ok|okay|friday|jarvis|please|just|can you|could you) )*"
+    r"(?:exit|quit)"
+    r"(?: (?:the )?(?:assistant|app|application|program|friday|jarvis))?"
+    r"(?: (?:now|please|friday|jarvis|right now))*"
+)
+
+COMMANDS = CommandRegistry()
+COMMANDS.register(EXIT_COMMAND, say_goodbye, keywords=("exit", "quit"), priority=100, shape=_EXIT_SHAPE)
+COMMANDS.register("notepad", open_notepad, keywords=("notepad",))
+COMMANDS.register("calculator", open_calculator, keywords=("calculator", "calc"))
+COMMANDS.register("browser", open_browser, keywords=("browser",))
+COMMANDS.register("shutdown", confirm_and_shutdown, keywords=("shutdown", "shut down"), priority=5)
+COMMANDS.register("youtube_search", open_youtube_search, keywords=("youtube",), excludes=("download",),
+                  priority=10, pass_text=True)
+COMMANDS.register("download_video", download_youtube_video, requires=("download", "video|videos"), priority=20)
+COMMANDS.register("weather", fetch_weather_message, keywords=("weather",))
+COMMANDS.register("login", perform_login_via_selenium, keywords=("login", "log in"), priority=15)
+# Either names a job or ends on "running", so "what is running water" is left to Gemini
+_JOB_STATUS_SHAPE = re.compile(r".*\b(?:jobs?|downloads?|background)\b.*|.*\brunning(?: right now| now| in the background)?")
+COMMANDS.register("job_status", report_jobs, priority=30, shape=_JOB_STATUS_SHAPE,
+                  keywords=("what's running", "what is running", "anything running", "job status",
+                            "running jobs", "any jobs", "background jobs", "download status"))
+COMMANDS.register("cancel_job", cancel_jobs, requires=("cancel|abort", "download|login|job|jobs|it|that"),
+                  priority=40, pass_text=True)
+
+
+# Sample transcripts and the command each should trigger (None falls through to Gemini)
+SAMPLE_UTTERANCES = [
+    ("exit", "exit"),
+    ("quit", "exit"),
+    ("okay quit now", "exit"),
+    ("please exit the assistant now", "exit"),
+    ("friday can you quit", "exit"),
+    ("i want to quit smoking", None),
+    ("that is quite interesting", None),
+    ("what is the exit velocity of earth", None),
+    ("open notepad", "notepad"),
+    ("please open the notepad for me", "notepad"),
+    ("open calculator", "calculator"),
+    ("calc", "calculator"),
+    ("explain calculus in simple words", None),
+    ("open the browser", "browser"),
+    ("shutdown the computer", "shutdown"),
+    ("shut down now", "shutdown"),
+    ("search for lofi music on youtube", "youtube_search"),
+    ("youtube cat videos", "youtube_search"),
+    ("download this video", "download_video"),
+    ("download the youtube video", "download_video"),
+    ("download videos from youtube", "download_video"),
+    ("what's the weather like", "weather"),
+    ("how is the weather in the browser", "browser"),
+    ("login to the portal", "login"),
+    ("log in to youtube", "login"),
+    ("please login to the site", "login"),
+    ("what is the capital of france", None),
+    ("tell me a joke about computers", None),
+    ("who wrote the theory of relativity", None),
+    ("what is the time zone of tokyo", None),
+    ("what's running", "job_status"),
+    ("are any jobs still going", "job_status"),
+    ("is anything running right now", "job_status"),
+    ("what is running in the background", "job_status"),
+    ("what is running water", None),
+    ("what's running the show at twitter", None),
+    ("cancel download", "cancel_job"),
+    ("cancel the video download", "cancel_job"),
+    ("abort the login", "cancel_job"),
+    ("cancel it", "cancel_job"),
+    ("how do i cancel my netflix subscription", None),
+    ("benefits of running every day", None),
+    ("tell me about steve jobs", None),
+    ("is the marathon still running this year", None),
+]
+
+
+def benchmark_intent_matching(registry: Optional[CommandRegistry] = None, rounds: int = 2000,
+                              extra_commands: Tuple[int, ...] = (0, 50, 200)) -> None:
+    """Times registry.match over SAMPLE_UTTERANCES and checks every expected intent.
+
+    The corpus is re-run with synthetic commands added to show that dispatch
+    cost stays flat as the command list grows.
+    """
+    registry = registry or COMMANDS
+    failures = [(text, expected, getattr(registry.match(text), "name", None))
+                for text, expected in SAMPLE_UTTERANCES
+                if getattr(registry.match(text), "name", None) != expected]
+    print(f"Intent accuracy: {len(SAMPLE_UTTERANCES) - len(failures)}/{len(SAMPLE_UTTERANCES)}")
+    for text, expected, got in failures:
+        print(f"  {text!r}: expected {expected}, got {got}")
+
+    for extra in extra_commands:
+        bench = CommandRegistry()
+        for command in registry:
+            bench.register(command.name, command.handler, command.keywords, command.requires,
+                           command.excludes, command.priority, command.pass_text, command.shape)
+        for i in range(extra):
+            bench.register(f"synthetic_{i}", lambda: None, keywords=(f"synthetic{i}", f"extra{i} phrase"))
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for text, _expected in SAMPLE_UTTERANCES:
+                bench.match(text)
+        elapsed = time.perf_counter() - start
+        per_match = elapsed / (rounds * len(SAMPLE_UTTERANCES)) * 1e6
+        print(f"{len(bench):4d} commands: {per_match:.2f} us per match")
+
+
+# ------------------------------
+# AI Responses
+# ------------------------------
+
+_CLAUSE_END = re.compile(r'[,;:](?=\s)')
+
+
+def stream_sentences(chunks, first_chunk_chars: int = FIRST_CHUNK_CHARS):
+    """Yields complete sentences from an iterable of text fragments as soon as they end.
+
+    The first piece is released early at a clause or word boundary once it
+    reaches first_chunk_chars, so speech can start before the first sentence
+    has fully arrived. A value of 0 disables the early release.
+    """
+    buffer = ""
+    first = True
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buffer += chunk
+        while True:
+            cut = _sentence_end(buffer)
+            if cut < 0 and first and first_chunk_chars and len(buffer) >= first_chunk_chars:
+                clauses = list(_CLAUSE_END.finditer(buffer))
+                cut = clauses[-1].end() if clauses else buffer.rfind(" ")
+            if cut <= 0:
+                break
+            sentence, buffer = buffer[:cut].strip(), buffer[cut:]
+            if sentence:
+                first = False
+                yield sentence
+    if buffer.strip():
+        yield buffer.strip()
+
+
+def _chunk_texts(stream):
+    for chunk in stream:
+        text = getattr(chunk, "text", None)
+        if text:
+            yield text
+
+
+def ask_gemini_streaming(query: str, ai_client=None, first_chunk_chars: int = FIRST_CHUNK_CHARS) -> str:
+    """Streams a Gemini answer into speech sentence by sentence and returns the full text."""
+    ai_client = ai_client or get_genai_client()
+    spoken = []
+    with get_tracer().span("gemini"):
+        stream = ai_client.models.generate_content_stream(model=GEMINI_MODEL, contents=query)
+        for sentence in stream_sentences(_chunk_texts(stream), first_chunk_chars):
+            spoken.append(sentence)
+            speak(sentence, wait=False)
+    wait_for_speech()
+    return " ".join(spoken)
+
+
+def ask_gemini(query: str, ai_client=None) -> str:
+    """Fetches the full Gemini answer, speaks it and returns the text."""
+    ai_client = ai_client or get_genai_client()
+    with get_tracer().span("gemini"):
+        response = ai_client.models.generate_content(model=GEMINI_MODEL, contents=query)
+    if response.text:
+        speak(response.text)
+    return response.text or ""
+
+
+AI_PROMPT_PREFIX = "in short and simple manner"
+
+# Answers to questions containing these words go stale quickly and are never cached
+_VOLATILE_WORDS = frozenset({
+    "today", "tonight", "tomorrow", "yesterday", "now", "current", "currently",
+    "latest", "news", "score", "weather", "price",
+})
+# Asking for the clock or calendar, but not "the time zone of tokyo" or "what day of the week was ..."
+_VOLATILE_PHRASES = re.compile(
+    r"\bwhat(?:s| is)? (?:the )?(?:time|date|day)(?= is it| now| today| right now| in |$)"
+    r"|\b(?:time|date|day) is it\b|\btodays date\b"
+)
+
+
+def normalize_query(query: str) -> str:
+    """Reduces a query to its cache key: lowercased, unpunctuated, without the prompt prefix."""
+    text = query.lower().translate(str.maketrans('', '', string.punctuation))
+    text = " ".join(text.split())
+    if text.startswith(AI_PROMPT_PREFIX):
+        text = text[len(AI_PROMPT_PREFIX):].strip()
+    return text
+
+
+class ResponseCache:
+    """LRU cache of Gemini answers in memory, backed by an SQLite file.
+
+    Entries expire after ttl seconds. The memory tier holds at most
+    max_memory entries and the disk tier at most max_disk; the least recently
+    used entries are evicted first. Pass path=None to keep everything in memory.
+    """
+
+    def __init__(self, path: Optional[str] = RESPONSE_CACHE_PATH, ttl: float = RESPONSE_CACHE_TTL,
+                 max_memory: int = 128, max_disk: int = 5000):
+        self.ttl = ttl
+        self.max_memory = max_memory
+        self.max_disk = max_disk
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        # Memory hits whose disk recency has not been written back yet
+        self._touched: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            if path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, answer TEXT NOT NULL, stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def is_cacheable(key: str) -> bool:
+        return bool(key) and _VOLATILE_WORDS.isdisjoint(key.split()) and not _VOLATILE_PHRASES.search(key)
+
+    def get(self, query: str) -> Optional[str]:
+        """Returns the cached answer for query, or None on a miss."""
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[0] < self.ttl:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    self._touch(key, now)
+                    return entry[1]
+                del self._memory[key]
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT answer, stored_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    answer, stored_at = row
+                    if now - stored_at < self.ttl:
+                        self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                        self._remember(key, stored_at, answer)
+                        self.disk_hits += 1
+                        return answer
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+            self.misses += 1
+            return None
+
+    def put(self, query: str, answer: str) -> None:
+        key = normalize_query(query)
+        if not answer or not self.is_cacheable(key):
+            return
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, answer)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, answer, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, answer, now, now),
+                )
+                self._flush_touched()
+                self._db.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_disk,),
+                )
+                self._db.commit()
+
+    def _touch(self, key: str, now: float) -> None:
+        """Queues a disk recency update for a memory hit; updates are written in batches."""
+        if self._db is None:
+            return
+        self._touched[key] = now
+        if len(self._touched) >= 32:
+            self._flush_touched()
+            self._db.commit()
+
+    def _flush_touched(self) -> None:
+        if self._db is not None and self._touched:
+            self._db.executemany(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self._touched.items()],
+            )
+        self._touched.clear()
+
+    def _remember(self, key: str, stored_at: float, answer: str) -> None:
+        self._memory[key] = (stored_at, answer)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._touched.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._flush_touched()
+                self._db.commit()
+                self._db.close()
+                self._db = None
+
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Returns the shared response cache, opening the SQLite store on first use."""
+    global _response_cache
+    if _response_cache is None:
+        try:
+            _response_cache = ResponseCache()
+        except Exception as e:
+            print(f"Response cache unavailable on disk, using memory only: {e}")
+            _response_cache = ResponseCache(path=None)
+    return _response_cache
+
+
+def answer_with_ai(user_input: str, ai_client=None, cache: Optional[ResponseCache] = None) -> None:
+    """Answers a free-form query with Gemini, serving repeated questions from the cache."""
+    if cache is None and RESPONSE_CACHE_ENABLED:
+        cache = get_response_cache()
+    ai_query = f"{AI_PROMPT_PREFIX} {user_input}"
+    if cache is not None:
+        with get_tracer().span("cache"):
+            cached = cache.get(ai_query)
+        if cached:
+            speak(cached)
+            return
+    try:
+        speak("Thinking...", wait=False, filler=True)
+        if STREAM_RESPONSES:
+            answer = ask_gemini_streaming(ai_query, ai_client)
+        else:
+            answer = ask_gemini(ai_query, ai_client)
+        if not answer:
+            speak("Sorry, I couldn't generate a response for that.")
+        elif cache is not None:
+            cache.put(ai_query, answer)
+    except Exception as e:
+        speak("Sorry, there was an error with the AI service.")
+        print(f"Gemini API error: {e}")
+
+
+# ------------------------------
+# Startup
+# ------------------------------
+
+def warm_up_in_background() -> None:
+    """Creates the Gemini client off the main thread so the first question does not wait for it."""
+    def warm():
+        try:
+            get_genai_client()
+        except Exception as e:
+            print(f"Gemini client warm-up failed: {e}")
+    threading.Thread(target=warm, name="warm-up", daemon=True).start()
+
+
+def start_assistant() -> None:
+    """Greets the user and starts every background worker, up to the first "Listening..." prompt."""
+    display_logo()
+    # Greet first; the AI client, weather and browser warm up while Friday talks
+    speak(random.choice(GREETINGS), wait=False)
+    warm_up_in_background()
+    start_weather_prefetch()
+    start_browser_prewarm()
+    wait_for_speech()
+    if CONTINUOUS_LISTENING:
+        try:
+            start_background_listening()
+        except Exception as e:
+            print(f"Background listening unavailable, falling back to per-turn capture: {e}")
+    if _background_listener is not None:
+        print(Fore.YELLOW + "Listening..." + Style.RESET_ALL)
+
+
+def shutdown_assistant() -> None:
+    """Stops every background worker that was started."""
+    stop_background_listening()
+    if _job_manager is not None:
+        _job_manager.shutdown()
+    get_speech_worker().shutdown()
+    if _response_cache is not None:
+        _response_cache.close()
+    if _weather_cache is not None:
+        _weather_cache.stop()
+    if _browser_pool is not None:
+        _browser_pool.close()
+
+
+def run_turn(user_input: str, registry: Optional[CommandRegistry] = None, ai_client=None,
+             cache: Optional[ResponseCache] = None) -> bool:
+    """Handles one transcribed phrase and waits for the reply to be spoken.
+
+    Returns False when the user asked to exit.
+    """
+    tracer = get_tracer()
+    tracer.begin_turn(user_input)
+    try:
+        # Try to execute a hardcoded command, exit included
+        with tracer.span("command"):
+            command = (registry or COMMANDS).match(user_input)
+            if command is not None:
+                command.run(user_input)
+        if command is not None and command.name == EXIT_COMMAND:
+            return False
+
+        # If no hardcoded command was found, use the AI
+        if command is None:
+            answer_with_ai(user_input, ai_client, cache)
+        wait_for_speech()
         return True
-    return False
+    finally:
+        tracer.end_turn()
+
+
+def benchmark_startup(runs: int = 5) -> None:
+    """Measures interpreter start, `import main` and time-to-first-prompt in fresh processes.
+
+    The first prompt case runs the full startup, greeting and microphone
+    calibration included, so it needs working audio devices.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    cases = [
+        ("python startup", [sys.executable, "-c", "pass"]),
+        ("import main", [sys.executable, "-c", "import main"]),
+        ("first prompt", [sys.executable, os.path.abspath(__file__), "--startup-only"]),
+    ]
+    for label, command in cases:
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run(command, cwd=here, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        print(f"{label:>14}: median {timings[len(timings) // 2] * 1000:7.1f} ms, best {timings[0] * 1000:7.1f} ms")
+
+
+# ------------------------------
+# Replay Benchmark
+# ------------------------------
+
+class _StubChunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubGeminiClient:
+    """Stands in for genai.Client: answers every query with reply after a fixed delay."""
+
+    def __init__(self, reply: str = "This is a stub answer. It has two sentences.",
+                 first_token_delay: float = 0.0, chunk_delay: float = 0.0, chunk_size: int = 12):
+        self.reply = reply
+        self.first_token_delay = first_token_delay
+        self.chunk_delay = chunk_delay
+        self.chunk_size = chunk_size
+        self.models = self
+
+    def generate_content_stream(self, model: str, contents: str):
+        time.sleep(self.first_token_delay)
+        for start in range(0, len(self.reply), self.chunk_size):
+            if start:
+                time.sleep(self.chunk_delay)
+            yield _StubChunk(self.reply[start:start + self.chunk_size])
+
+    def generate_content(self, model: str, contents: str):
+        time.sleep(self.first_token_delay + self.chunk_delay * (len(self.reply) // self.chunk_size))
+        return _StubChunk(self.reply)
+
+
+class StubTTSEngine:
+    """A pyttsx3 stand-in that takes seconds_per_char to 'speak' each segment."""
+
+    def __init__(self, seconds_per_char: float = 0.0):
+        self.seconds_per_char = seconds_per_char
+        self._pending = ""
+
+    def setProperty(self, name, value) -> None:
+        pass
+
+    def say(self, text: str) -> None:
+        self._pending = text
+
+    def runAndWait(self) -> None:
+        time.sleep(len(self._pending) * self.seconds_per_char)
+        self._pending = ""
+
+    def stop(self) -> None:
+        pass
+
+
+def _dry_run_registry(registry: CommandRegistry) -> CommandRegistry:
+    """Copies registry with handlers that only announce the command instead of running it."""
+    dry = CommandRegistry()
+    for command in registry:
+        dry.register(command.name, lambda name=command.name: speak(f"Running {name}.", wait=False),
+                     command.keywords, command.requires, command.excludes, command.priority,
+                     shape=command.shape)
+    return dry
+
+
+def replay_benchmark(wav_dir: str, stt_delay: float = 0.0, llm: Optional[StubGeminiClient] = None,
+                     tts_seconds_per_char: float = 0.0, execute_commands: bool = False,
+                     trace_path: Optional[str] = None) -> TurnTracer:
+    """Feeds recorded WAV utterances through the whole turn pipeline with stub backends.
+
+    Each <name>.wav is read through sr.AudioFile. Its transcript comes from
+    <name>.txt next to it, or from the file name with underscores as spaces.
+    Speech recognition, Gemini and text-to-speech are replaced by stubs and
+    commands only announce themselves unless execute_commands is set, so the
+    loop runs headless without a microphone or network.
+    """
+    global _speech_worker, _tracer
+    sr = get_sr()
+    recognizer = get_recognizer()
+    paths = sorted(os.path.join(wav_dir, name) for name in os.listdir(wav_dir) if name.lower().endswith(".wav"))
+    transcripts: Dict[int, str] = {}
+
+    def stub_stt(audio):
+        time.sleep(stt_delay)
+        return transcripts.get(id(audio))
+
+    pipeline = RecognitionPipeline([CallableEngine("stub", stub_stt)], gate=VoiceActivityGate())
+    registry = COMMANDS if execute_commands else _dry_run_registry(COMMANDS)
+    llm = llm or StubGeminiClient()
+    cache = ResponseCache(path=None)
+
+    saved_worker, saved_tracer = _speech_worker, _tracer
+    tracer = TurnTracer(trace_path)
+    _tracer = tracer
+    _speech_worker = SpeechWorker(engine_factory=lambda: StubTTSEngine(tts_seconds_per_char))
+    try:
+        for path in paths:
+            text_path = os.path.splitext(path)[0] + ".txt"
+            if os.path.exists(text_path):
+                with open(text_path, encoding="utf-8") as f:
+                    expected = f.read().strip()
+            else:
+                expected = os.path.splitext(os.path.basename(path))[0].replace("_", " ")
+            spans: Dict[str, float] = {}
+            with TurnTracer.timed(spans, "listen"):
+                with sr.AudioFile(path) as source:
+                    audio = recognizer.record(source)
+            transcripts[id(audio)] = expected
+            user_input = transcribe(audio, pipeline, spans)
+            if user_input:
+                tracer.adopt(spans)
+                run_turn(user_input, registry, llm, cache)
+    finally:
+        _speech_worker.shutdown()
+        _speech_worker, _tracer = saved_worker, saved_tracer
+    return tracer
 
 
 # ------------------------------
 # Main loop
 # ------------------------------
 if __name__ == "__main__":
-    display_logo()
-    speak(random.choice(GREETINGS))
-    while True:
-        user_input = listen()
-        if user_input:
-            # First, check for exit commands
-            if "exit" in user_input or "quit" in user_input:
-                speak(random.choice(GOODBYES))
-                break
+    if "--bench-intents" in sys.argv:
+        benchmark_intent_matching()
+        sys.exit(0)
 
-            # Next, try to execute a hardcoded command
-            command_executed = execute_hardcoded_command(user_input)
+    if "--bench-startup" in sys.argv:
+        benchmark_startup()
+        sys.exit(0)
+    if "--replay" in sys.argv:
+        replay_dir = sys.argv[sys.argv.index("--replay") + 1]
+        replay_benchmark(replay_dir, trace_path=TRACE_PATH or None).report()
+        sys.exit(0)
 
-            # If no hardcoded command was found, use the AI
-            if not command_executed:
-                try:
-                    speak("Thinking...")
-                    ai_query = f"in short and simple manner {user_input}"
-                    response = client.models.generate_content(
-                        model="gemini-2.5-flash",
-                        contents=ai_query,
-                    )
-                    if response.text:
-                        speak(response.text)
-                    else:
-                        speak("Sorry, I couldn't generate a response for that.")
-                except Exception as e:
-                    speak("Sorry, there was an error with the AI service.")
-                    print(f"Gemini API error: {e}")
+    try:
+        start_assistant()
+        if "--startup-only" in sys.argv:
+            if _background_listener is None:
+                # Per-turn capture shows its prompt once the microphone is open
+                with get_sr().Microphone():
+                    print(Fore.YELLOW + "Listening..." + Style.RESET_ALL)
+            sys.exit(0)
+        while True:
+            user_input = listen()
+            if user_input and not run_turn(user_input):
+                break
+    finally:
+        # Also runs on Ctrl+C or an unexpected error so worker threads never outlive the loop
+        shutdown_assistant()
+    if TRACE_PATH:
+        get_tracer().report()
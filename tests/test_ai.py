@@ -0,0 +1,76 @@
+import pytest
+
+import main
+
+
+class BrokenStream(main.StubGeminiClient):
+    """Streams the first chunk of the reply and then loses the connection."""
+
+    def generate_content_stream(self, model, contents):
+        yield main._StubChunk(self.reply[:self.chunk_size])
+        raise ConnectionError("stream reset")
+
+
+@pytest.fixture
+def spoken(monkeypatch):
+    spoken = []
+    monkeypatch.setattr(main, "speak", lambda text, wait=True, filler=False: spoken.append(text))
+    monkeypatch.setattr(main, "wait_for_speech", lambda timeout=None: True)
+    monkeypatch.setattr(main, "RESPONSE_CACHE_ENABLED", False)
+    return spoken
+
+
+def test_sentence_split_across_chunk_boundaries():
+    chunks = ["The pole is 3.", "5 meters long. It was ", "painted in", " 1999! Done"]
+    assert list(main.stream_sentences(chunks, first_chunk_chars=0)) == [
+        "The pole is 3.5 meters long.", "It was painted in 1999!", "Done",
+    ]
+
+
+def test_abbreviations_do_not_end_a_sentence():
+    text = "Dr. Smith and Mr. Jones met at 5 p.m. on Main St. in town. They talked, e.g. about work."
+    assert list(main.stream_sentences([text], first_chunk_chars=0)) == [
+        "Dr. Smith and Mr. Jones met at 5 p.m. on Main St. in town.", "They talked, e.g. about work.",
+    ]
+    assert main._split_for_speech("Dr. Smith is here. No. He left.") == ["Dr Smith is here", "No", "He left"]
+
+
+def test_first_piece_is_released_early_at_a_clause():
+    chunks = ["Photosynthesis, which happens in the leaves of green plants", " and algae, turns light",
+              " into chemical energy. Plants need it."]
+    pieces = list(main.stream_sentences(chunks, first_chunk_chars=40))
+    assert pieces[0] == "Photosynthesis,"
+    assert pieces[1:] == ["which happens in the leaves of green plants and algae, turns light into chemical energy.",
+                          "Plants need it."]
+
+
+def test_early_release_falls_back_to_a_word_boundary():
+    pieces = list(main.stream_sentences(["one two three four five six", " seven."], first_chunk_chars=10))
+    assert pieces == ["one two three four five", "six seven."]
+
+
+def test_streaming_speaks_each_sentence_as_it_arrives(spoken):
+    client = main.StubGeminiClient("The Eiffel Tower is in Paris. It opened in 1889.", chunk_size=7)
+    answer = main.ask_gemini_streaming("where is the eiffel tower", client, first_chunk_chars=0)
+    assert spoken == ["The Eiffel Tower is in Paris.", "It opened in 1889."]
+    assert answer == "The Eiffel Tower is in Paris. It opened in 1889."
+
+
+def test_error_mid_stream_is_reported(spoken, capsys):
+    client = BrokenStream("Paris is the capital of France. It is large.", chunk_size=32)
+    main.answer_with_ai("what is the capital of france", client)
+    assert spoken == ["Thinking...", "Paris is the capital of France.",
+                      "Sorry, there was an error with the AI service."]
+    assert "stream reset" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("streaming", [True, False])
+def test_answer_with_ai_uses_the_stub_client(spoken, monkeypatch, streaming):
+    monkeypatch.setattr(main, "STREAM_RESPONSES", streaming)
+    main.answer_with_ai("who wrote hamlet", main.StubGeminiClient("Shakespeare wrote it."))
+    assert spoken == ["Thinking...", "Shakespeare wrote it."]
+
+
+def test_empty_answer_is_apologised_for(spoken):
+    main.answer_with_ai("who wrote hamlet", main.StubGeminiClient(""))
+    assert spoken[-1] == "Sorry, I couldn't generate a response for that."
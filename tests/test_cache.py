@@ -0,0 +1,105 @@
+import time
+
+import pytest
+
+import main
+
+
+@pytest.mark.parametrize("query,cacheable", [
+    ("in short and simple manner what is the time zone of tokyo", True),
+    ("what day of the week was july 4 1776", True),
+    ("what is the time complexity of quicksort", True),
+    ("define time", True),
+    ("what time is it", False),
+    ("what's the time in London?", False),
+    ("what is the date", False),
+    ("what day is it", False),
+    ("what is today's date", False),
+    ("latest news about mars", False),
+])
+def test_clock_and_calendar_questions_are_not_cached(query, cacheable):
+    assert main.ResponseCache.is_cacheable(main.normalize_query(query)) is cacheable
+
+
+def test_hits_misses_and_ttl_expiry(tmp_path):
+    cache = main.ResponseCache(path=str(tmp_path / "cache.sqlite3"), ttl=0.2)
+    assert cache.get("who wrote hamlet") is None
+    cache.put("Who wrote Hamlet?", "Shakespeare.")
+    assert cache.get("who wrote hamlet") == "Shakespeare."
+    cache._memory.clear()
+    assert cache.get("who wrote hamlet") == "Shakespeare."
+    time.sleep(0.25)
+    assert cache.get("who wrote hamlet") is None
+    assert cache.stats() == {"memory_hits": 1, "disk_hits": 1, "misses": 2, "memory_entries": 0}
+    cache.close()
+
+
+def test_memory_evicts_least_recently_used():
+    cache = main.ResponseCache(path=None, max_memory=2)
+    cache.put("alpha", "a")
+    cache.put("beta", "b")
+    cache.get("alpha")
+    cache.put("gamma", "c")
+    assert cache.get("beta") is None
+    assert cache.get("alpha") == "a" and cache.get("gamma") == "c"
+
+
+def test_memory_hits_keep_disk_entries_fresh(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = main.ResponseCache(path=path, max_disk=2)
+    cache.put("alpha", "a")
+    time.sleep(0.01)
+    cache.put("beta", "b")
+    time.sleep(0.01)
+    assert cache.get("alpha") == "a"  # served from memory
+    time.sleep(0.01)
+    cache.put("gamma", "c")
+    cache.close()
+
+    reopened = main.ResponseCache(path=path)
+    assert reopened.get("beta") is None
+    assert reopened.get("alpha") == "a" and reopened.get("gamma") == "c"
+    reopened.close()
+
+
+def test_recency_from_memory_hits_survives_close(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = main.ResponseCache(path=path, max_disk=2)
+    cache.put("alpha", "a")
+    time.sleep(0.01)
+    cache.put("beta", "b")
+    time.sleep(0.01)
+    cache.get("alpha")
+    cache.close()
+
+    reopened = main.ResponseCache(path=path, max_disk=2)
+    reopened.put("gamma", "c")
+    assert reopened.get("alpha") == "a"
+    reopened._memory.clear()
+    assert reopened.get("beta") is None
+    reopened.close()
+
+
+class CountingClient(main.StubGeminiClient):
+    calls = 0
+
+    def generate_content_stream(self, model, contents):
+        self.calls += 1
+        return super().generate_content_stream(model, contents)
+
+
+def test_answer_with_ai_serves_repeats_from_the_cache(monkeypatch):
+    spoken = []
+    monkeypatch.setattr(main, "speak", lambda text, wait=True, filler=False: spoken.append(text))
+    monkeypatch.setattr(main, "wait_for_speech", lambda timeout=None: True)
+    monkeypatch.setattr(main, "STREAM_RESPONSES", True)
+    cache = main.ResponseCache(path=None)
+    client = CountingClient("Tokyo uses Japan Standard Time.")
+    for _ in range(2):
+        main.answer_with_ai("what is the time zone of tokyo", client, cache)
+    assert client.calls == 1
+    assert spoken == ["Thinking...", "Tokyo uses Japan Standard Time.", "Tokyo uses Japan Standard Time."]
+
+    for _ in range(2):
+        main.answer_with_ai("what time is it in tokyo", client, cache)
+    assert client.calls == 3
@@ -0,0 +1,31 @@
+import re
+
+import pytest
+
+import main
+
+
+@pytest.mark.parametrize("text,expected", main.SAMPLE_UTTERANCES)
+def test_sample_utterances_match_expected_command(text, expected):
+    command = main.COMMANDS.match(text)
+    assert getattr(command, "name", None) == expected
+
+
+def test_words_are_matched_whole():
+    assert main.COMMANDS.match("explain calculus") is None
+    assert main.COMMANDS.match("calc").name == "calculator"
+
+
+def test_shape_limits_commands_to_whole_phrases():
+    registry = main.CommandRegistry()
+    registry.register("stop", lambda: None, keywords=("stop",), shape=re.compile(r"(?:please )?stop(?: now)?"))
+    assert registry.match("please stop now").name == "stop"
+    assert registry.match("stop").name == "stop"
+    assert registry.match("how do i stop my dog barking") is None
+
+
+def test_priority_beats_registration_order():
+    registry = main.CommandRegistry()
+    registry.register("low", lambda: None, keywords=("youtube",))
+    registry.register("high", lambda: None, keywords=("login",), priority=10)
+    assert registry.match("login to youtube").name == "high"
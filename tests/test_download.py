@@ -0,0 +1,94 @@
+import json
+import os
+import re
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+import main
+
+pytest.importorskip("requests")
+
+DATA = os.urandom(3 * 1024 * 1024 + 123)
+CHUNK = 256 * 1024
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    support_ranges = True
+    ranges = []
+
+    def do_GET(self):
+        header = self.headers.get("Range")
+        if header and self.support_ranges:
+            start, end = map(int, re.match(r"bytes=(\d+)-(\d+)", header).groups())
+            type(self).ranges.append((start, end))
+            body = DATA[start:end + 1]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(DATA)}")
+        else:
+            body = DATA
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except ConnectionError:
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def file_url(http_server):
+    RangeHandler.support_ranges = True
+    RangeHandler.ranges = []
+    return http_server(RangeHandler) + "/video.mp4"
+
+
+class Interrupted(Exception):
+    pass
+
+
+def test_parallel_ranged_download_matches_source(file_url, tmp_path):
+    progress = []
+    path = str(tmp_path / "video.mp4")
+    main.RangedDownloader(file_url, path, connections=4, chunk_size=CHUNK,
+                          on_progress=lambda done, total, rate: progress.append((done, total))).download()
+    with open(path, "rb") as f:
+        assert f.read() == DATA
+    assert progress[-1] == (len(DATA), len(DATA))
+    assert not os.path.exists(path + ".part") and not os.path.exists(path + ".part.json")
+
+
+def test_interrupted_download_resumes_missing_chunks_only(file_url, tmp_path):
+    path = str(tmp_path / "video.mp4")
+
+    def stop_halfway(done, total, rate):
+        if done > total // 2:
+            raise Interrupted()
+
+    with pytest.raises(Interrupted):
+        main.RangedDownloader(file_url, path, connections=2, chunk_size=CHUNK, on_progress=stop_halfway).download()
+    with open(path + ".part.json") as f:
+        done = set(json.load(f)["done"])
+    assert done
+
+    RangeHandler.ranges = []
+    progress = []
+    main.RangedDownloader(file_url, path, connections=2, chunk_size=CHUNK,
+                          on_progress=lambda done, total, rate: progress.append(done)).download()
+    with open(path, "rb") as f:
+        assert f.read() == DATA
+    fetched = {start // CHUNK for start, end in RangeHandler.ranges if (start, end) != (0, 0)}
+    assert fetched == set(range(-(-len(DATA) // CHUNK))) - done
+    assert progress[0] > 0
+
+
+def test_server_without_range_support_falls_back_to_single_stream(file_url, tmp_path):
+    RangeHandler.support_ranges = False
+    path = str(tmp_path / "video.mp4")
+    main.RangedDownloader(file_url, path, chunk_size=CHUNK).download()
+    with open(path, "rb") as f:
+        assert f.read() == DATA
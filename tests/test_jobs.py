@@ -0,0 +1,98 @@
+import threading
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def announced():
+    return []
+
+
+@pytest.fixture
+def manager(announced, monkeypatch):
+    manager = main.JobManager(max_workers=1, announce=announced.append)
+    monkeypatch.setattr(main, "_job_manager", manager)
+    yield manager
+    manager.shutdown()
+
+
+@pytest.fixture
+def spoken(monkeypatch):
+    spoken = []
+    monkeypatch.setattr(main, "speak", lambda text, wait=True, filler=False: spoken.append(text))
+    return spoken
+
+
+def until_cancelled(job, started=None):
+    if started is not None:
+        started.set()
+    while True:
+        job.report(detail="working")
+        threading.Event().wait(0.01)
+
+
+def test_progress_status_and_completion(manager, announced):
+    halfway, finish = threading.Event(), threading.Event()
+
+    def work(job):
+        job.report(0.5)
+        halfway.set()
+        finish.wait(2)
+
+    job = manager.submit("download", work, description="video download", done_message="Video downloaded.")
+    assert halfway.wait(2)
+    assert job.status == "running" and job.summary() == "video download is running, 50 percent done"
+    assert manager.active() == [job]
+    finish.set()
+    job.future.result(timeout=2)
+    assert (job.status, job.progress) == ("done", 1.0)
+    assert announced == ["Video downloaded."] and manager.active() == []
+
+
+def test_failure_is_announced(manager, announced):
+    def fail(job):
+        raise OSError("disk full")
+
+    job = manager.submit("download", fail, description="video download")
+    job.future.result(timeout=2)
+    assert job.status == "failed"
+    assert announced == ["Sorry, the video download failed."]
+
+
+def test_cancel_while_running_and_while_queued(manager, announced):
+    started = threading.Event()
+    running = manager.submit("download", until_cancelled, started, description="video download")
+    queued = manager.submit("login", until_cancelled, description="login")
+    assert started.wait(2)
+    assert queued.status == "queued"
+
+    assert manager.cancel("login") == [queued]
+    assert queued.status == "cancelled"
+    assert manager.cancel() == [running]
+    running.future.result(timeout=2)
+    assert running.status == "cancelled"
+    assert announced == ["The video download was cancelled."]
+
+
+def test_voice_commands_report_and_cancel_by_name(manager, spoken):
+    main.report_jobs()
+    main.cancel_jobs("cancel it")
+    assert spoken == ["Nothing is running right now.", "There is nothing to cancel."]
+
+    started = threading.Event()
+    download = manager.submit("download", until_cancelled, started, description="video download")
+    login = manager.submit("login", until_cancelled, description="login")
+    assert started.wait(2)
+    spoken.clear()
+    main.report_jobs()
+    assert spoken == ["Video download is running. Login is queued."]
+
+    main.cancel_jobs("cancel the login")
+    assert spoken[-1] == "Cancelling the login."
+    assert login.cancel_requested and not download.cancel_requested
+    main.cancel_jobs("cancel it")
+    assert spoken[-1] == "Cancelling the video download."
+    download.future.result(timeout=2)
+    assert manager.active() == []
@@ -0,0 +1,96 @@
+import threading
+import time
+
+import pytest
+
+import main
+
+sr = pytest.importorskip("speech_recognition")
+
+SHORT_PHRASE = sr.AudioData(b"\0\0" * 3200, 16000, 2)
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    worker = main.SpeechWorker(engine_factory=lambda: main.StubTTSEngine(seconds_per_char=0.005))
+    monkeypatch.setattr(main, "_speech_worker", worker)
+    monkeypatch.setattr(main, "_tracer", main.TurnTracer())
+    yield worker
+    worker.shutdown()
+
+
+@pytest.fixture
+def make_listener(monkeypatch):
+    listeners = []
+    monkeypatch.setattr(main, "transcribe", lambda audio, pipeline=None, spans=None: getattr(audio, "text", None))
+
+    def make(**kwargs):
+        recognizer = sr.Recognizer()
+        recognizer.pause_threshold = 0.1
+        listener = main.BackgroundListener(recognizer, source_factory=lambda: None, **kwargs)
+        # Run the recognizer thread without opening a microphone
+        listener._thread = threading.Thread(target=listener._recognize_loop, daemon=True)
+        listener._thread.start()
+        monkeypatch.setattr(main, "_background_listener", listener)
+        listeners.append(listener)
+        return listener
+
+    yield make
+    for listener in listeners:
+        listener.stop()
+
+
+def phrase(text):
+    audio = sr.AudioData(SHORT_PHRASE.frame_data, 16000, 2)
+    audio.text = text
+    return audio
+
+
+def test_audio_heard_while_speaking_is_dropped(worker, make_listener):
+    listener = make_listener(ignore_while_speaking=True, barge_in=False)
+    main.speak("Do you really want to shut down?", wait=False)
+    listener._on_audio(listener.recognizer, phrase("do you really want to shut down"))
+    main.wait_for_speech()
+    listener._on_audio(listener.recognizer, phrase("just finished speaking"))
+    assert listener.get(timeout=1) is None
+
+    time.sleep(0.4)
+    listener._on_audio(listener.recognizer, phrase("yes"))
+    assert listener.get(timeout=1) == "yes"
+
+
+def test_clear_drops_phrases_still_being_transcribed(worker, make_listener, monkeypatch):
+    listener = make_listener(ignore_while_speaking=False, barge_in=False)
+    started, release = threading.Event(), threading.Event()
+
+    def slow_transcribe(audio, pipeline=None, spans=None):
+        started.set()
+        release.wait(2)
+        return audio.text
+
+    monkeypatch.setattr(main, "transcribe", slow_transcribe)
+    listener._on_audio(listener.recognizer, phrase("opening notepad"))
+    assert started.wait(1)
+    listener.clear()
+    release.set()
+    assert main.listen(timeout=0.5, fresh=True) is None
+
+
+def test_blocking_speak_discards_its_own_echo(worker, make_listener):
+    listener = make_listener(ignore_while_speaking=True, barge_in=False)
+    listener._put_latest(listener._transcripts, ("opening notepad", {}))
+    main.speak("Opening Notepad.")
+    assert main.listen(timeout=0.2) is None
+
+
+def test_barge_in_keeps_the_interrupting_phrase(worker, make_listener):
+    listener = make_listener(barge_in=True)
+    assert not listener.ignore_while_speaking
+    answer = " ".join(["The answer goes on for a while."] * 20)
+    speaker = threading.Thread(target=main.speak, args=(answer,))
+    speaker.start()
+    time.sleep(0.1)
+    listener._on_audio(listener.recognizer, phrase("open notepad"))
+    speaker.join(timeout=2)
+    assert not speaker.is_alive()
+    assert main.listen(timeout=1) == "open notepad"
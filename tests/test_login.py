@@ -0,0 +1,164 @@
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs
+
+import pytest
+
+import main
+
+requests = pytest.importorskip("requests")
+
+LOGIN_PAGE = """<html><body>
+<form id="search"><input id="q" name="q"></form>
+<form method="post" action="/session">
+  <input type="hidden" name="csrf" value="token-123">
+  <input id="username" name="user">
+  <input id="password" name="pass" type="password">
+  <input type="checkbox" name="remember">
+  <input type="submit" name="go" value="Sign in">
+</form></body></html>"""
+
+SCRIPT_PAGE = """<html><body>
+<form onsubmit="return signIn()">
+  <input id="username" name="user"><input id="password" name="pass" type="password">
+</form></body></html>"""
+
+
+class LoginHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    posted = []
+
+    def _reply(self, status, body, cookie=None):
+        body = body.encode()
+        self.send_response(status)
+        if cookie:
+            self.send_header("Set-Cookie", cookie)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/script":
+            self._reply(200, SCRIPT_PAGE)
+        elif self.path == "/blocked":
+            self._reply(403, "Forbidden")
+        elif "session=friday" in self.headers.get("Cookie", ""):
+            self._reply(200, "<html><body>Welcome back</body></html>")
+        else:
+            self._reply(200, LOGIN_PAGE)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        form = {name: values[0] for name, values in parse_qs(self.rfile.read(length).decode()).items()}
+        type(self).posted.append(form)
+        if form.get("csrf") == "token-123" and form.get("pass") == "secret":
+            self._reply(200, "<html><body>Welcome back</body></html>", cookie="session=friday; Path=/")
+        else:
+            self._reply(200, LOGIN_PAGE)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def login_url(http_server):
+    LoginHandler.posted = []
+    return http_server(LoginHandler)
+
+
+def test_http_login_submits_hidden_fields(login_url):
+    assert main.login_via_http(login_url + "/login", "friday", "secret", "username", "password",
+                               session=requests.Session())
+    assert LoginHandler.posted == [{"csrf": "token-123", "user": "friday", "pass": "secret"}]
+
+
+def test_second_login_is_not_confused_by_the_first_ones_cookies(login_url, monkeypatch):
+    for _ in range(2):
+        assert main.login_via_http(login_url + "/login", "friday", "secret", "username", "password")
+    assert len(LoginHandler.posted) == 2
+
+    monkeypatch.setattr(main, "LOGIN_MODE", "http")
+    for _ in range(2):
+        main._login_job(main.Job(1, "login", "login"), login_url + "/login", "friday", "secret")
+    assert len(LoginHandler.posted) == 4
+
+
+def test_http_login_rejects_wrong_password(login_url):
+    with pytest.raises(main.LoginError):
+        main.login_via_http(login_url + "/login", "friday", "wrong", "username", "password",
+                            session=requests.Session())
+
+
+def test_script_driven_form_needs_a_browser(login_url):
+    assert not main.login_via_http(login_url + "/script", "friday", "secret", "username", "password",
+                                   session=requests.Session())
+    assert LoginHandler.posted == []
+
+
+class FakeDriver:
+    def __init__(self):
+        self.alive = True
+        self.quit_called = False
+        self.cookies = {"session": "friday"}
+
+    @property
+    def current_url(self):
+        if not self.alive:
+            raise RuntimeError("session closed")
+        return "about:blank"
+
+    def delete_all_cookies(self):
+        self.cookies.clear()
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_browser_pool_reuses_and_replaces_drivers():
+    created = []
+
+    def factory():
+        created.append(FakeDriver())
+        return created[-1]
+
+    pool = main.BrowserPool(driver_factory=factory)
+    with pool.driver() as first:
+        pass
+    with pool.driver() as second:
+        assert second is first and second.cookies == {}
+    first.alive = False
+    with pool.driver() as third:
+        assert third is not first
+    assert first.quit_called and len(created) == 2
+
+    with pytest.raises(ValueError):
+        with pool.driver() as broken:
+            raise ValueError("page crashed")
+    assert broken is third and broken.quit_called
+    with pool.driver() as fourth:
+        assert fourth is not third
+    pool.close()
+    assert fourth.quit_called and len(created) == 3
+
+
+@pytest.fixture
+def browser_login(monkeypatch):
+    calls = []
+    monkeypatch.setattr(main, "get_selenium", lambda: object())
+    monkeypatch.setattr(main, "_browser_pool", main.BrowserPool(driver_factory=FakeDriver))
+    monkeypatch.setattr(main, "login_via_browser", lambda driver, url, *args: calls.append(url))
+    yield calls
+    main._browser_pool.close()
+
+
+def test_auto_mode_falls_back_to_browser_when_http_is_blocked(login_url, browser_login, monkeypatch):
+    monkeypatch.setattr(main, "LOGIN_MODE", "auto")
+    main._login_job(main.Job(1, "login", "login"), login_url + "/blocked", "friday", "secret")
+    assert browser_login == [login_url + "/blocked"]
+
+
+def test_http_mode_reports_blocked_login(login_url, browser_login, monkeypatch):
+    monkeypatch.setattr(main, "LOGIN_MODE", "http")
+    with pytest.raises(requests.RequestException):
+        main._login_job(main.Job(1, "login", "login"), login_url + "/blocked", "friday", "secret")
+    assert browser_login == []
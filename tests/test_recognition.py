@@ -0,0 +1,120 @@
+import math
+import threading
+import time
+import wave
+from array import array
+
+import pytest
+
+import main
+
+sr = pytest.importorskip("speech_recognition")
+
+RATE = 16000
+
+
+def write_wav(path, seconds, amplitude):
+    samples = array("h", (int(amplitude * math.sin(2 * math.pi * 440 * i / RATE)) for i in range(int(seconds * RATE))))
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(RATE)
+        f.writeframes(samples.tobytes())
+    with sr.AudioFile(str(path)) as source:
+        return sr.Recognizer().record(source)
+
+
+@pytest.fixture
+def speech(tmp_path):
+    return write_wav(tmp_path / "speech.wav", 1.0, 8000)
+
+
+@pytest.fixture
+def silence(tmp_path):
+    return write_wav(tmp_path / "silence.wav", 1.0, 20)
+
+
+@pytest.fixture
+def hang():
+    release = threading.Event()
+    yield release
+    release.set()
+
+
+def engine(name, reply, calls=None, delay=0.0, **kwargs):
+    def recognize(audio):
+        if calls is not None:
+            calls.append(name)
+        time.sleep(delay)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+    return main.CallableEngine(name, recognize, **kwargs)
+
+
+def test_gate_drops_silence_before_any_engine(speech, silence):
+    calls = []
+    pipeline = main.RecognitionPipeline([engine("cloud", "hello", calls)],
+                                        gate=main.VoiceActivityGate(energy_threshold=300))
+    assert pipeline.recognize(silence) is None
+    assert calls == [] and pipeline.stats["gated"] == 1
+    assert pipeline.recognize(speech).text == "hello"
+
+
+def test_first_confident_engine_wins_the_race(speech):
+    pipeline = main.RecognitionPipeline([
+        engine("slow", ("slow answer", 0.99), delay=1.0),
+        engine("unsure", ("maybe", 0.2)),
+        engine("fast", ("fast answer", 0.9), delay=0.05),
+    ])
+    started = time.monotonic()
+    assert pipeline.recognize(speech).engine == "fast"
+    assert time.monotonic() - started < 0.5
+
+
+def test_hung_engines_do_not_starve_later_phrases(speech, hang):
+    hung = main.CallableEngine("hung", lambda audio: hang.wait(), timeout=0.1)
+    healthy = engine("healthy", ("open notepad", 0.4), delay=0.02)
+    pipeline = main.RecognitionPipeline([hung, hung, hung, hung, healthy])
+    started = time.monotonic()
+    for _ in range(5):
+        assert pipeline.recognize(speech).text == "open notepad"
+    assert time.monotonic() - started < 2
+    assert pipeline.stats["timeouts"] == 20
+
+
+def test_wake_word_is_checked_offline_first(speech):
+    calls = []
+    pipeline = main.RecognitionPipeline([engine("cloud", "friday open notepad", calls)],
+                                        local_engine=engine("local", ("open notepad", 0.6), offline=True),
+                                        wake_word="friday")
+    assert pipeline.recognize(speech) is None
+    assert calls == [] and pipeline.stats["wake_rejected"] == 1
+
+    pipeline.local_engine = engine("local", ("Friday, open notepad", 0.95), offline=True)
+    result = pipeline.recognize(speech)
+    assert result.text == "open notepad" and result.engine == "local"
+
+
+def test_failing_local_engine_falls_through_to_cloud(speech, capsys):
+    pipeline = main.RecognitionPipeline([engine("cloud", "friday what is the weather")],
+                                        local_engine=engine("local", RuntimeError("no model"), offline=True),
+                                        wake_word="friday")
+    for _ in range(3):
+        assert pipeline.recognize(speech).text == "what is the weather"
+    assert capsys.readouterr().out.count("Local speech engine failed") == 1
+
+    pipeline.engines = [engine("cloud", "what is the weather")]
+    assert pipeline.recognize(speech) is None
+
+
+def test_transcribe_names_the_engine_that_failed(speech, monkeypatch):
+    spoken = []
+    monkeypatch.setattr(main, "speak", lambda text, wait=True: spoken.append(text))
+    pipeline = main.RecognitionPipeline([engine("whisper", sr.RequestError("quota exceeded"))])
+    assert main.transcribe(speech, pipeline) is None
+    assert spoken == ["Could not request results from the whisper speech service; quota exceeded"]
+
+
+def test_cloud_requests_give_up_at_the_engine_timeout():
+    assert main.GoogleEngine(timeout=2.5).recognizer.operation_timeout == 2.5
@@ -0,0 +1,104 @@
+import math
+import threading
+import time
+import wave
+from array import array
+
+import pytest
+
+import main
+
+sr = pytest.importorskip("speech_recognition")
+
+
+@pytest.fixture
+def tracer(monkeypatch):
+    tracer = main.TurnTracer()
+    worker = main.SpeechWorker(engine_factory=lambda: main.StubTTSEngine(seconds_per_char=0.001))
+    monkeypatch.setattr(main, "_tracer", tracer)
+    monkeypatch.setattr(main, "_speech_worker", worker)
+    monkeypatch.setattr(main, "_background_listener", None)
+    yield tracer
+    worker.shutdown()
+
+
+def test_speech_outside_a_turn_is_not_folded_into_the_next(tracer):
+    main.speak("Good morning Sir, how can I help you today?")
+    tracer.begin_turn("open notepad")
+    turn = tracer.end_turn()
+    assert "speak" not in turn["spans"]
+    assert tracer.percentiles("speak")["count"] == 1
+
+
+def test_filler_does_not_count_as_first_audio(tracer):
+    tracer.begin_turn("who wrote hamlet")
+    main.speak("Thinking...", wait=False, filler=True)
+    main.wait_for_speech()
+    assert "first_audio" not in tracer._current["marks"]
+    main.speak("Hamlet was written by William Shakespeare.")
+    turn = tracer.end_turn()
+    assert "first_audio" in turn["marks"] and turn["spans"]["speak"] > 0
+
+
+def write_wav(path, seconds, amplitude):
+    samples = array("h", (int(amplitude * math.sin(2 * math.pi * 440 * i / 16000)) for i in range(int(seconds * 16000))))
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes(samples.tobytes())
+
+
+def test_phrase_spans_go_to_the_turn_the_phrase_starts(tracer, monkeypatch):
+    def recognize(audio):
+        time.sleep(0.05)
+        return audio.text
+
+    monkeypatch.setattr(main, "_recognition_pipeline", main.RecognitionPipeline([main.CallableEngine("stub", recognize)]))
+    recognizer = sr.Recognizer()
+    listener = main.BackgroundListener(recognizer, source_factory=lambda: None, ignore_while_speaking=False)
+    listener._thread = threading.Thread(target=listener._recognize_loop, daemon=True)
+    listener._thread.start()
+    try:
+        first = sr.AudioData(b"\0\0" * 16000, 16000, 2)
+        first.text = "open notepad"
+        listener._on_audio(recognizer, first)
+        assert listener.get(timeout=2) == "open notepad"
+        tracer.begin_turn("open notepad")
+        # The next phrase is heard and recognized while turn 1 is still running
+        second = sr.AudioData(b"\0\0" * 8000, 16000, 2)
+        second.text = "open calculator"
+        listener._on_audio(recognizer, second)
+        deadline = time.monotonic() + 2
+        while listener._transcripts.empty() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        turn1 = tracer.end_turn()
+        assert listener.get(timeout=1) == "open calculator"
+        tracer.begin_turn("open calculator")
+        turn2 = tracer.end_turn()
+    finally:
+        listener.stop()
+
+    pause = recognizer.pause_threshold * 1000
+    assert turn1["spans"]["listen"] == pytest.approx(1000 + pause)
+    assert turn2["spans"]["listen"] == pytest.approx(500 + pause)
+    for turn in (turn1, turn2):
+        assert 50 <= turn["spans"]["recognize"] < 1000
+
+
+def test_replay_benchmark_runs_headless(tmp_path):
+    write_wav(tmp_path / "open_notepad.wav", 0.6, 8000)
+    write_wav(tmp_path / "question.wav", 0.6, 8000)
+    (tmp_path / "question.txt").write_text("who wrote hamlet")
+    write_wav(tmp_path / "room_noise.wav", 0.6, 20)
+
+    llm = main.StubGeminiClient("Hamlet was written by Shakespeare. It dates from about 1600.")
+    tracer = main.replay_benchmark(str(tmp_path), llm=llm, trace_path=str(tmp_path / "trace.jsonl"))
+
+    assert [turn["text"] for turn in tracer.turns] == ["open notepad", "who wrote hamlet"]
+    for turn in tracer.turns:
+        assert {"listen", "recognize", "command", "speak"} <= set(turn["spans"])
+        assert "first_audio" in turn["marks"]
+    assert "gemini" in tracer.turns[1]["spans"] and "gemini" not in tracer.turns[0]["spans"]
+    assert len((tmp_path / "trace.jsonl").read_text().splitlines()) == 2
+    assert tracer.percentiles("turn")["count"] == 2
@@ -0,0 +1,71 @@
+import json
+import time
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+import main
+
+pytest.importorskip("requests")
+
+
+class WeatherHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = set()
+    requests = 0
+
+    def do_GET(self):
+        type(self).requests += 1
+        type(self).connections.add(self.client_address)
+        body = json.dumps({"weather": [{"description": "haze"}], "main": {"temp": 31}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def weather_url(http_server):
+    WeatherHandler.connections = set()
+    WeatherHandler.requests = 0
+    return http_server(WeatherHandler) + "/weather"
+
+
+def test_fetches_reuse_one_pooled_connection(weather_url):
+    cache = main.WeatherCache("key", ttl=0, base_url=weather_url, session=main.get_http_session())
+    for _ in range(5):
+        message = cache.fetch("Indore")
+    assert "haze" in message and "31" in message
+    assert WeatherHandler.requests == 5
+    assert len(WeatherHandler.connections) == 1
+
+
+def test_fresh_report_is_served_from_memory(weather_url):
+    cache = main.WeatherCache("key", ttl=60, base_url=weather_url)
+    cache.fetch("Indore")
+    for _ in range(5):
+        assert cache.get("indore") is not None
+    assert WeatherHandler.requests == 1
+    assert cache.get("Pune") is None
+
+
+def test_report_expires_after_ttl(weather_url):
+    cache = main.WeatherCache("key", ttl=0.05, base_url=weather_url)
+    cache.fetch("Indore")
+    time.sleep(0.1)
+    assert cache.get("Indore") is None
+
+
+def test_refresher_keeps_city_warm(weather_url):
+    cache = main.WeatherCache("key", ttl=0.2, base_url=weather_url)
+    cache.start_refresher("Indore", interval=0.05)
+    try:
+        time.sleep(0.3)
+        assert cache.get("Indore") is not None
+        assert WeatherHandler.requests >= 3
+    finally:
+        cache.stop()